@@ -0,0 +1,66 @@
+"""
+Analytics Rollup Module
+Background aggregator folding oe_analytics rows into summary tables
+"""
+
+import logging
+import time
+from typing import Dict, Any, Optional
+
+from oe_database import OEDatabase
+from periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsRollup(PeriodicTask):
+    """Periodically runs the ``oe_rollup_analytics`` database function
+
+    The function folds pending ``oe_analytics`` rows into ``oe_content_stats``
+    and ``oe_user_stats`` in one set-based statement and marks them rolled up,
+    so every row is counted exactly once. Reads then hit the small summary
+    tables instead of the raw event log.
+    """
+
+    def __init__(self, db: OEDatabase, interval: float = 60.0, batch_size: int = 10000):
+        super().__init__(interval)
+        self.db = db
+        self.batch_size = batch_size
+        self.counters = {"runs": 0, "rows_folded": 0, "errors": 0}
+        self.last_run_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    async def run_once(self) -> int:
+        """Fold every pending row, a batch at a time"""
+        folded = 0
+        while True:
+            result = await self.db.run(
+                lambda client: client.rpc("oe_rollup_analytics", {"batch_size": self.batch_size})
+            )
+            batch = int(result.data or 0)
+            folded += batch
+            if batch < self.batch_size:
+                break
+        self.counters["runs"] += 1
+        self.counters["rows_folded"] += folded
+        self.last_run_at = time.time()
+        return folded
+
+    async def tick(self):
+        try:
+            folded = await self.run_once()
+        except Exception as e:
+            self.counters["errors"] += 1
+            self.last_error = str(e)
+            raise
+        self.last_error = None
+        if folded:
+            logger.info(f"Rolled up {folded} analytics rows")
+
+    def stats(self) -> Dict[str, Any]:
+        """Run counters and the last outcome"""
+        return {
+            **self.counters,
+            "last_run_at": self.last_run_at,
+            "last_error": self.last_error
+        }
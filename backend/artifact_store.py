@@ -0,0 +1,122 @@
+"""
+Artifact Store Module
+Content-addressed storage for generated files, shared between workflow steps
+"""
+
+import asyncio
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+
+class ArtifactStore:
+    """Content-addressed file store with reference counting
+
+    Files are named by their SHA-256, so identical outputs are stored once.
+    Workflow steps pass around small JSON-safe handles
+    (``{"artifact_id", "sha256", "size", "filename"}``) and only read the
+    bytes when they need them. A file is deleted once its last reference is
+    released. With a ``ledger`` (e.g. StorageLedger), a file is counted
+    from its first reference until that deletion.
+    """
+
+    def __init__(self, root: Path, ledger=None):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ledger = ledger
+        self.refs: Dict[str, int] = {}
+
+    def path(self, artifact_id: str) -> Path:
+        """Filesystem path for an artifact"""
+        # Artifact ids are bare file names; never let one escape the root
+        return self.root / Path(artifact_id).name
+
+    def _handle(self, artifact_id: str, sha256: str, size: int, filename: Optional[str]) -> Dict[str, Any]:
+        if artifact_id not in self.refs and self.ledger is not None:
+            self.ledger.record_write(size)
+        self.refs[artifact_id] = self.refs.get(artifact_id, 0) + 1
+        return {
+            "artifact_id": artifact_id,
+            "sha256": sha256,
+            "size": size,
+            "filename": filename
+        }
+
+    async def put_bytes(self, data: bytes, suffix: str = "", filename: Optional[str] = None) -> Dict[str, Any]:
+        """Store raw bytes and return a handle"""
+        sha256 = hashlib.sha256(data).hexdigest()
+        artifact_id = f"{sha256}{suffix}"
+        path = self.path(artifact_id)
+
+        def write():
+            if path.exists():
+                return
+            temp_path = self.root / f".{uuid.uuid4()}.part"
+            temp_path.write_bytes(data)
+            os.replace(temp_path, path)
+
+        await asyncio.to_thread(write)
+        return self._handle(artifact_id, sha256, len(data), filename)
+
+    async def register_file(self, path: Path, sha256: str, size: int, filename: Optional[str] = None) -> Dict[str, Any]:
+        """Take ownership of a file that was already written and hashed
+
+        Files outside the store root are moved in under their hash name.
+        """
+        artifact_id = f"{sha256}{path.suffix}"
+        target = self.path(artifact_id)
+        if path != target:
+            await asyncio.to_thread(os.replace, path, target)
+        return self._handle(artifact_id, sha256, size, filename)
+
+    async def read(self, handle: Dict[str, Any]) -> bytes:
+        """Load an artifact's bytes"""
+        return await asyncio.to_thread(self.path(handle["artifact_id"]).read_bytes)
+
+    def acquire(self, handle: Dict[str, Any]):
+        """Add a reference to an existing artifact"""
+        artifact_id = handle["artifact_id"]
+        self.refs[artifact_id] = self.refs.get(artifact_id, 0) + 1
+
+    async def release(self, handle: Dict[str, Any]):
+        """Drop a reference, deleting the file when none remain"""
+        artifact_id = handle["artifact_id"]
+        remaining = self.refs.get(artifact_id, 0) - 1
+        if remaining > 0:
+            self.refs[artifact_id] = remaining
+            return
+        self.refs.pop(artifact_id, None)
+        await asyncio.to_thread(self.path(artifact_id).unlink, True)
+        if self.ledger is not None:
+            self.ledger.record_delete(handle["size"])
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of tracked artifacts and references"""
+        return {
+            "artifacts": len(self.refs),
+            "references": sum(self.refs.values())
+        }
+
+
+def find_handles(value: Any) -> List[Dict[str, Any]]:
+    """Collect every artifact handle nested inside a step result"""
+    if isinstance(value, dict):
+        if "artifact_id" in value:
+            return [value]
+        return [handle for item in value.values() for handle in find_handles(item)]
+    if isinstance(value, list):
+        return [handle for item in value for handle in find_handles(item)]
+    return []
+
+
+def strip_binary(value: Any) -> Any:
+    """Replace any raw bytes in a result with a size placeholder"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, dict):
+        return {key: strip_binary(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [strip_binary(item) for item in value]
+    return value
@@ -0,0 +1,119 @@
+"""
+DB Load Benchmark
+p50/p95/p99 latency of real_main endpoints under 200 concurrent clients
+
+Runs the app in-process through ``httpx.ASGITransport`` with the Supabase
+client replaced by a stand-in whose ``execute()`` blocks for a fixed round
+trip, like the synchronous supabase-py client does. Each run is done twice:
+once with queries on the OEDatabase executor, and once with them executed
+inline on the event loop, which is how the handlers behaved before.
+
+Usage (from backend/):
+    python benchmarks/bench_db_load.py [--clients 200] [--requests 5] [--latency-ms 20]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("OE_STORAGE_PATH", tempfile.mkdtemp(prefix="oe-bench-"))
+
+import httpx  # noqa: E402
+
+import real_main  # noqa: E402
+
+
+class FakeResult:
+    def __init__(self, data: List[Dict[str, Any]], count: int):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """Chainable stand-in for a PostgREST query builder"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def __getattr__(self, name: str):
+        # select/eq/or_/order/limit/insert... all just return the builder
+        return lambda *args, **kwargs: self
+
+    def execute(self) -> FakeResult:
+        # Blocks the calling thread for one round trip, like supabase-py
+        time.sleep(self.latency)
+        return FakeResult([], 1234)
+
+
+class FakeSupabase:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self.latency)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run_load(mode: str, clients: int, requests: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    transport = httpx.ASGITransport(app=real_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(index: int):
+            for i in range(requests):
+                # Distinct users so the listing cache never answers for the DB
+                path = "/api/stats" if i % 2 else f"/api/content/{mode}-{index}-{i}"
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.text
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(index) for index in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5, help="requests per client")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated DB round trip")
+    args = parser.parse_args()
+
+    db = real_main.db
+    db.client = FakeSupabase(args.latency_ms / 1000)
+    executor_run = db.run
+
+    async def inline_run(build):
+        return build(db.client).execute()
+
+    print(f"{args.clients} clients x {args.requests} requests, {args.latency_ms:.0f}ms DB round trip")
+    for mode, run in (("executor", executor_run), ("inline", inline_run)):
+        db.run = run
+        result = await run_load(mode, args.clients, args.requests)
+        print(
+            f"{mode:>9}: {result['requests']} requests, {result['rps']:.0f} req/s, "
+            f"p50 {result['p50_ms']:.0f}ms, p95 {result['p95_ms']:.0f}ms, p99 {result['p99_ms']:.0f}ms"
+        )
+    db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
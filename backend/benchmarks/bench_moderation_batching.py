@@ -0,0 +1,102 @@
+"""
+Moderation Batching Benchmark
+items/sec through ModerationBatcher at different batch sizes
+
+Drives ``ModerationBatcher`` against an Ollama stand-in served by
+``httpx.MockTransport``. The stand-in runs one generation at a time, like a
+single-GPU Ollama with the default ``OLLAMA_NUM_PARALLEL=1``. Each generation
+costs a fixed overhead plus a smaller cost per moderated item, so batching
+spreads the overhead over more items.
+
+Usage (from backend/):
+    python benchmarks/bench_moderation_batching.py [--items 256] [--overhead-ms 40] [--per-item-ms 4]
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+
+from http_clients import http_clients, origin_of  # noqa: E402
+from ollama_integration import ContentModerationAI, ModerationBatcher, OllamaClient  # noqa: E402
+
+OLLAMA_URL = "http://ollama.bench:11434"
+BATCH_SIZES = (1, 8, 32)
+ITEM_LINE = re.compile(r'^\s*\d+\. "', re.MULTILINE)
+
+
+def make_handler(overhead: float, per_item: float):
+    model = asyncio.Lock()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        prompt = json.loads(request.content)["prompt"]
+        items = len(ITEM_LINE.findall(prompt))
+        async with model:
+            await asyncio.sleep(overhead + per_item * max(items, 1))
+
+        if items:
+            verdicts = [
+                {"item": i, "approved": True, "concerns": [], "suggestions": []}
+                for i in range(1, items + 1)
+            ]
+            reply = json.dumps(verdicts)
+        else:
+            reply = json.dumps({"approved": True, "concerns": [], "suggestions": []})
+        return httpx.Response(200, json={"response": reply, "done": True})
+
+    return handler
+
+
+async def run(batch_size: int, items: int, overhead: float, per_item: float) -> dict:
+    origin = origin_of(OLLAMA_URL)
+    # Fresh stand-in per run so the model lock belongs to this event loop
+    http_clients.clients[origin] = httpx.AsyncClient(
+        transport=httpx.MockTransport(make_handler(overhead, per_item)),
+        timeout=60.0
+    )
+    batcher = ModerationBatcher(
+        ContentModerationAI(OllamaClient(OLLAMA_URL)),
+        max_batch_size=batch_size,
+        max_wait_ms=5.0
+    )
+
+    started = time.perf_counter()
+    verdicts = await asyncio.gather(*(
+        batcher.check_content(f"caption {batch_size}-{i}") for i in range(items)
+    ))
+    elapsed = time.perf_counter() - started
+    assert all(verdict["approved"] for verdict in verdicts)
+
+    await http_clients.close()
+    return {"elapsed": elapsed, "items_per_sec": items / elapsed, **batcher.batch_stats()}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--items", type=int, default=256)
+    parser.add_argument("--overhead-ms", type=float, default=40.0, help="fixed cost per generation")
+    parser.add_argument("--per-item-ms", type=float, default=4.0, help="extra cost per moderated item")
+    args = parser.parse_args()
+
+    print(
+        f"{args.items} items, {args.overhead_ms:.0f}ms per generation "
+        f"+ {args.per_item_ms:.0f}ms per item"
+    )
+    for batch_size in BATCH_SIZES:
+        result = await run(batch_size, args.items, args.overhead_ms / 1000, args.per_item_ms / 1000)
+        print(
+            f"batch {batch_size:>2}: {result['items_per_sec']:7.1f} items/s "
+            f"({result['batches']} generations, avg batch {result['avg_batch_size']}, "
+            f"{result['elapsed']:.2f}s)"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
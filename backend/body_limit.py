@@ -0,0 +1,67 @@
+"""
+Body Limit Module
+ASGI middleware that caps request body size before anything parses it
+"""
+
+import json
+from typing import Dict
+
+from starlette.exceptions import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class BodySizeLimitMiddleware:
+    """Rejects request bodies over a per-path byte limit
+
+    FastAPI parses multipart forms before the endpoint runs, so a size check
+    inside the handler only fires after the whole upload has been read. This
+    runs first: a declared Content-Length over the limit gets a 413 without
+    reading the body, and bodies without one (chunked transfer) are counted
+    as they arrive and cut off as soon as they pass the limit.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > limit:
+            await self._reject(send, limit)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # FastAPI re-raises HTTPExceptions from body parsing as-is
+                    raise HTTPException(status_code=413, detail=self._detail(limit))
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    def _detail(limit: int) -> str:
+        return f"Request body exceeds {limit} bytes"
+
+    async def _reject(self, send: Send, limit: int):
+        body = json.dumps({"detail": self._detail(limit)}, separators=(",", ":")).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close")
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
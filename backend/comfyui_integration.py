@@ -5,43 +5,206 @@ Handles communication with ComfyUI for image generation workflows
 
 import json
 import asyncio
+import copy
+import hashlib
+import os
+import random
 import httpx
-from typing import Dict, Any, Optional
+import aiofiles
+import websockets
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, AsyncIterator
 from pathlib import Path
 import uuid
+import time
+import logging
+from oe_config import (
+    OE_STORAGE_BASE,
+    OE_COMFYUI_HISTORY_POLL_SECONDS,
+    OE_COMFYUI_TIMEOUT_BASE_SECONDS,
+    OE_COMFYUI_TIMEOUT_PER_STEP_SECONDS
+)
+from http_clients import http_clients
+from metrics import stage, STAGE_SECONDS, RETRIES, TIMEOUTS
+
+logger = logging.getLogger(__name__)
+
+# Sampler settings per quality tier
+QUALITY_PRESETS = {
+    "standard": {"steps": 20, "cfg": 7.0},
+    "high": {"steps": 30, "cfg": 8.0},
+    "ultra": {"steps": 50, "cfg": 10.0}
+}
+
+
+class ComfyUIValidationError(Exception):
+    """ComfyUI rejected a workflow as invalid (HTTP 400 from /prompt)
+    
+    The fault is in the workflow, not the worker, so the pool neither
+    retries it elsewhere nor counts it against the worker's breaker.
+    """
+    
+    def __init__(self, message: str, node_errors: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.node_errors = node_errors or {}
+
+
+class ComfyUIEventListener:
+    """Long-lived websocket listener for ComfyUI execution events
+    
+    ComfyUI pushes progress and completion events for every prompt queued
+    with our ``client_id``. One connection is shared by all generations and
+    events are routed to per-prompt futures. Prompts that finish before
+    anyone waits on them are remembered briefly so the result is not lost.
+    """
+    
+    def __init__(self, base_url: str, client_id: str, max_finished: int = 1024):
+        ws_base = base_url.replace("https://", "wss://", 1).replace("http://", "ws://", 1)
+        self.ws_url = f"{ws_base}/ws?clientId={client_id}"
+        self.waiters: Dict[str, asyncio.Future] = {}
+        self.progress: Dict[str, Dict[str, Any]] = {}
+        # When ComfyUI started executing each prompt, splitting queue wait from sampling
+        self.started_at: Dict[str, float] = {}
+        self.finished: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.max_finished = max_finished
+        self.connected = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start the listener task if it is not already running"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+    
+    async def _run(self):
+        """Keep the websocket connected, reconnecting with backoff"""
+        backoff = 1.0
+        while True:
+            try:
+                async with websockets.connect(self.ws_url, max_size=None) as ws:
+                    self.connected.set()
+                    backoff = 1.0
+                    async for message in ws:
+                        # Binary frames are preview images; only JSON events matter here
+                        if isinstance(message, bytes):
+                            continue
+                        self._dispatch(json.loads(message))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"ComfyUI websocket disconnected: {e}")
+            finally:
+                self.connected.clear()
+                # Waiters fall back to polling rather than hang on a dead socket
+                self._fail_waiters(ConnectionError("ComfyUI websocket disconnected"))
+            
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+    
+    def _dispatch(self, event: Dict[str, Any]):
+        """Route a ComfyUI event to the waiter for its prompt"""
+        event_type = event.get("type")
+        data = event.get("data") or {}
+        prompt_id = data.get("prompt_id")
+        if not prompt_id:
+            return
+        
+        if event_type == "execution_start":
+            self.started_at[prompt_id] = time.monotonic()
+            if len(self.started_at) > self.max_finished:
+                # Nobody collected these; drop the oldest
+                del self.started_at[next(iter(self.started_at))]
+        elif event_type == "progress":
+            self.progress[prompt_id] = {"value": data.get("value"), "max": data.get("max")}
+        elif event_type == "execution_success" or (event_type == "executing" and data.get("node") is None):
+            self._finish(prompt_id, {"status": "completed"})
+        elif event_type in ("execution_error", "execution_interrupted"):
+            self._finish(prompt_id, {
+                "status": "error",
+                "error": data.get("exception_message") or event_type
+            })
+    
+    def _finish(self, prompt_id: str, result: Dict[str, Any]):
+        """Resolve a prompt's waiter, or remember the result for a later waiter"""
+        self.progress.pop(prompt_id, None)
+        waiter = self.waiters.pop(prompt_id, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(result)
+            return
+        
+        self.finished[prompt_id] = result
+        while len(self.finished) > self.max_finished:
+            self.finished.popitem(last=False)
+    
+    def _fail_waiters(self, error: Exception):
+        """Fail every pending waiter"""
+        waiters, self.waiters = self.waiters, {}
+        for waiter in waiters.values():
+            if not waiter.done():
+                waiter.set_exception(error)
+    
+    async def wait_for(self, prompt_id: str, timeout: float) -> Dict[str, Any]:
+        """Wait for a prompt's completion or error event"""
+        if prompt_id in self.finished:
+            return self.finished.pop(prompt_id)
+        if not self.connected.is_set():
+            raise ConnectionError("ComfyUI websocket not connected")
+        
+        waiter = self.waiters.get(prompt_id)
+        if waiter is None:
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters[prompt_id] = waiter
+        
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        finally:
+            self.waiters.pop(prompt_id, None)
+    
+    def get_progress(self, prompt_id: str) -> Optional[Dict[str, Any]]:
+        """Latest sampler progress for a prompt, if any"""
+        return self.progress.get(prompt_id)
+    
+    async def close(self):
+        """Stop the listener"""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self.task = None
+
 
 class ComfyUIClient:
-    def __init__(self, base_url: str = "http://localhost:8188"):
+    def __init__(self, base_url: str = "http://localhost:8188", workflow_manager: Optional["WorkflowManager"] = None):
         self.base_url = base_url
-        self.client = httpx.AsyncClient(timeout=60.0)
+        self.workflows = workflow_manager or WorkflowManager()
+        # Execution events are only pushed to the client_id that queued the prompt
+        self.client_id = str(uuid.uuid4())
+        self.listener = ComfyUIEventListener(base_url, self.client_id)
         
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled client for this ComfyUI host"""
+        return http_clients.client(self.base_url, timeout=60.0)
+    
     async def get_workflow(self, workflow_name: str) -> Dict[str, Any]:
-        """Load a workflow template from file"""
-        workflow_path = Path(f"workflows/{workflow_name}.json")
-        if not workflow_path.exists():
-            raise FileNotFoundError(f"Workflow {workflow_name} not found")
-        
-        with open(workflow_path, "r") as f:
-            return json.load(f)
+        """Get a private copy of a workflow template"""
+        return copy.deepcopy(self.workflows.get_compiled(workflow_name).template)
     
-    async def modify_workflow(self, workflow: Dict[str, Any], prompt: str, style: str = "photorealistic", quality: str = "standard") -> Dict[str, Any]:
+    async def modify_workflow(self, workflow: Dict[str, Any], prompt: str, style: str = "photorealistic", quality: str = "standard", batch_size: int = 1) -> Dict[str, Any]:
         """Modify workflow with generation parameters"""
         # Find and update the prompt node
         for node_id, node in workflow.items():
             if node.get("class_type") == "CLIPTextEncode" and "positive" in node.get("_meta", {}).get("title", "").lower():
                 node["inputs"]["text"] = prompt
             
+            # One sampler pass renders the whole batch
+            if node.get("class_type") == "EmptyLatentImage":
+                node["inputs"]["batch_size"] = batch_size
+            
             # Update sampler settings based on quality
             if node.get("class_type") == "KSampler":
-                if quality == "high":
-                    node["inputs"]["steps"] = 30
-                    node["inputs"]["cfg"] = 8.0
-                elif quality == "ultra":
-                    node["inputs"]["steps"] = 50
-                    node["inputs"]["cfg"] = 10.0
-                else:  # standard
-                    node["inputs"]["steps"] = 20
-                    node["inputs"]["cfg"] = 7.0
+                node["inputs"].update(QUALITY_PRESETS.get(quality, QUALITY_PRESETS["standard"]))
         
         return workflow
     
@@ -52,7 +215,7 @@ class ComfyUIClient:
         # Prepare the API request
         data = {
             "prompt": workflow,
-            "client_id": prompt_id
+            "client_id": self.client_id
         }
         
         response = await self.client.post(
@@ -60,12 +223,51 @@ class ComfyUIClient:
             json=data
         )
         
+        if response.status_code == 400:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            error = body.get("error")
+            message = error.get("message") if isinstance(error, dict) else error
+            raise ComfyUIValidationError(
+                f"Invalid workflow: {message or response.text}",
+                body.get("node_errors")
+            )
         if response.status_code != 200:
             raise Exception(f"Failed to queue prompt: {response.text}")
         
         result = response.json()
         return result.get("prompt_id", prompt_id)
     
+    async def get_queue_depth(self) -> int:
+        """Number of prompts running or pending on this ComfyUI instance"""
+        response = await self.client.get(f"{self.base_url}/queue", timeout=5.0)
+        response.raise_for_status()
+        queue = response.json()
+        return len(queue.get("queue_running", [])) + len(queue.get("queue_pending", []))
+    
+    async def cancel_prompt(self, prompt_id: str):
+        """Remove a prompt from the queue, interrupting it if it is running
+        
+        ``/interrupt`` stops whatever is executing, so it is only sent once
+        ``/queue`` shows this prompt is the one running.
+        """
+        response = await self.client.post(f"{self.base_url}/queue", json={"delete": [prompt_id]}, timeout=5.0)
+        response.raise_for_status()
+        
+        response = await self.client.get(f"{self.base_url}/queue", timeout=5.0)
+        response.raise_for_status()
+        if any(item[1] == prompt_id for item in response.json().get("queue_running", [])):
+            response = await self.client.post(f"{self.base_url}/interrupt", json={"prompt_id": prompt_id}, timeout=5.0)
+            response.raise_for_status()
+    
+    @staticmethod
+    def completion_timeout(quality: str, batch_size: int) -> float:
+        """Seconds to wait for a prompt, scaled by sampler steps and batch size"""
+        steps = QUALITY_PRESETS.get(quality, QUALITY_PRESETS["standard"])["steps"]
+        return OE_COMFYUI_TIMEOUT_BASE_SECONDS + OE_COMFYUI_TIMEOUT_PER_STEP_SECONDS * steps * batch_size
+    
     async def get_generation_status(self, prompt_id: str) -> Dict[str, Any]:
         """Check the status of a generation"""
         response = await self.client.get(
@@ -80,18 +282,20 @@ class ComfyUIClient:
         if prompt_id in history:
             prompt_info = history[prompt_id]
             if "outputs" in prompt_info:
-                # Find the output image
-                for node_id, output in prompt_info["outputs"].items():
-                    if "images" in output:
-                        images = output["images"]
-                        if images:
-                            return {
-                                "status": "completed",
-                                "images": images,
-                                "filename": images[0]["filename"],
-                                "subfolder": images[0].get("subfolder", ""),
-                                "type": images[0].get("type", "output")
-                            }
+                # Collect the output images from every node
+                images = [
+                    image
+                    for output in prompt_info["outputs"].values()
+                    for image in output.get("images", [])
+                ]
+                if images:
+                    return {
+                        "status": "completed",
+                        "images": images,
+                        "filename": images[0]["filename"],
+                        "subfolder": images[0].get("subfolder", ""),
+                        "type": images[0].get("type", "output")
+                    }
             
             # Check if there was an error
             if prompt_info.get("status", {}).get("status_str") == "error":
@@ -120,49 +324,163 @@ class ComfyUIClient:
         
         return response.content
     
-    async def generate_image(self, prompt: str, style: str = "photorealistic", quality: str = "standard", workflow_name: str = "default") -> Dict[str, Any]:
-        """Complete image generation pipeline"""
-        # Load and modify workflow
-        workflow = await self.get_workflow(workflow_name)
-        workflow = await self.modify_workflow(workflow, prompt, style, quality)
+    async def iter_image(
+        self,
+        filename: str,
+        subfolder: str = "",
+        image_type: str = "output",
+        chunk_size: int = 64 * 1024
+    ) -> AsyncIterator[bytes]:
+        """Stream generated image data without buffering the whole file"""
+        params = {
+            "filename": filename,
+            "subfolder": subfolder,
+            "type": image_type
+        }
+        
+        async with self.client.stream("GET", f"{self.base_url}/view", params=params) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise Exception(f"Failed to retrieve image: {response.text}")
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+    
+    async def download_image(self, image: Dict[str, Any], dest_dir: Path = OE_STORAGE_BASE / "generated") -> Dict[str, Any]:
+        """Stream one output image to disk, hashing it on the way
         
-        # Queue the generation
-        prompt_id = await self.queue_prompt(workflow)
+        The file is written under a temporary name and renamed to its SHA-256
+        once complete, so identical outputs are stored only once.
+        """
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = dest_dir / f".{uuid.uuid4()}.part"
+        digest = hashlib.sha256()
+        size = 0
         
-        # Poll for completion
-        max_attempts = 60  # 60 seconds timeout
-        for _ in range(max_attempts):
-            status = await self.get_generation_status(prompt_id)
-            
-            if status["status"] == "completed":
-                # Get the image data
-                image_data = await self.get_image(
-                    status["filename"],
-                    status.get("subfolder", ""),
-                    status.get("type", "output")
-                )
-                
-                return {
-                    "success": True,
-                    "prompt_id": prompt_id,
-                    "image_data": image_data,
-                    "filename": status["filename"],
-                    "metadata": {
-                        "prompt": prompt,
-                        "style": style,
-                        "quality": quality,
-                        "workflow": workflow_name
-                    }
-                }
+        try:
+            async with aiofiles.open(temp_path, "wb") as f:
+                async for chunk in self.iter_image(
+                    image["filename"],
+                    image.get("subfolder", ""),
+                    image.get("type", "output")
+                ):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    await f.write(chunk)
             
-            elif status["status"] == "error":
-                return {
-                    "success": False,
-                    "error": status.get("error", "Generation failed"),
-                    "prompt_id": prompt_id
-                }
+            sha256 = digest.hexdigest()
+            path = dest_dir / f"{sha256}{Path(image['filename']).suffix}"
+            await asyncio.to_thread(os.replace, temp_path, path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        
+        return {
+            "filename": image["filename"],
+            "path": str(path),
+            "sha256": sha256,
+            "size": size
+        }
+    
+    async def download_images(
+        self,
+        images: List[Dict[str, Any]],
+        dest_dir: Path = OE_STORAGE_BASE / "generated",
+        max_concurrency: int = 4
+    ) -> List[Dict[str, Any]]:
+        """Stream several output images to disk with bounded parallelism"""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def download(image: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.download_image(image, dest_dir)
+        
+        return list(await asyncio.gather(*(download(image) for image in images)))
+    
+    async def generate_image(
+        self,
+        prompt: str,
+        style: str = "photorealistic",
+        quality: str = "standard",
+        workflow_name: str = "default",
+        batch_size: int = 1,
+        download_to: Optional[Path] = None
+    ) -> Dict[str, Any]:
+        """Complete image generation pipeline
+        
+        With ``download_to`` set, outputs are streamed to that directory and
+        the result lists file paths and hashes instead of inline image bytes.
+        """
+        # Make sure completion events are being listened for
+        self.listener.start()
+        
+        # Patch a copy of the pre-compiled template
+        workflow = self.workflows.get_compiled(workflow_name).instantiate(prompt, quality, batch_size)
+        
+        # Queue the generation. ComfyUI can start executing before /prompt
+        # has answered, so the queue wait is measured from before the POST.
+        queued_at = time.monotonic()
+        with stage("queue_prompt"):
+            prompt_id = await self.queue_prompt(workflow)
+        
+        with stage("history_wait"):
+            status = await self.wait_for_completion(prompt_id, self.completion_timeout(quality, batch_size))
+        
+        started_at = self.listener.started_at.pop(prompt_id, None)
+        if started_at is not None:
+            STAGE_SECONDS.observe(started_at - queued_at, "comfyui_queue_wait")
+            STAGE_SECONDS.observe(time.monotonic() - started_at, "comfyui_sampling")
+        if status["status"] == "timeout":
+            TIMEOUTS.inc("comfyui")
+        
+        metadata = {
+            "prompt": prompt,
+            "style": style,
+            "quality": quality,
+            "workflow": workflow_name,
+            "batch_size": batch_size
+        }
+        
+        if status["status"] == "completed" and download_to is not None:
+            with stage("get_image"):
+                files = await self.download_images(status["images"], download_to)
+            return {
+                "success": True,
+                "prompt_id": prompt_id,
+                "filename": status["filename"],
+                "images": files,
+                "metadata": metadata
+            }
+        
+        if status["status"] == "completed":
+            # Get the data for every output image concurrently
+            with stage("get_image"):
+                image_data = await asyncio.gather(*(
+                    self.get_image(
+                        image["filename"],
+                        image.get("subfolder", ""),
+                        image.get("type", "output")
+                    )
+                    for image in status["images"]
+                ))
             
-            await asyncio.sleep(1)
+            return {
+                "success": True,
+                "prompt_id": prompt_id,
+                "image_data": image_data[0],
+                "filename": status["filename"],
+                "images": [
+                    {"filename": image["filename"], "image_data": data}
+                    for image, data in zip(status["images"], image_data)
+                ],
+                "metadata": metadata
+            }
+        
+        elif status["status"] == "error":
+            return {
+                "success": False,
+                "error": status.get("error", "Generation failed"),
+                "prompt_id": prompt_id
+            }
         
         return {
             "success": False,
@@ -170,9 +488,272 @@ class ComfyUIClient:
             "prompt_id": prompt_id
         }
     
+    async def wait_for_completion(self, prompt_id: str, timeout: float = 60.0) -> Dict[str, Any]:
+        """Wait for a queued prompt via websocket events, falling back to polling
+        
+        Events can be missed while the websocket reconnects, so ``/history``
+        is also checked every ``OE_COMFYUI_HISTORY_POLL_SECONDS`` and once
+        more before giving up.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        
+        while loop.time() < deadline:
+            try:
+                event = await self.listener.wait_for(
+                    prompt_id, min(OE_COMFYUI_HISTORY_POLL_SECONDS, deadline - loop.time())
+                )
+            except asyncio.TimeoutError:
+                status = await self.get_generation_status(prompt_id)
+                if status["status"] != "processing":
+                    return status
+                continue
+            except ConnectionError:
+                break
+            
+            if event["status"] == "error":
+                return event
+            
+            # The completion event carries no outputs, so read them from history once
+            status = await self.get_generation_status(prompt_id)
+            if status["status"] != "processing":
+                return status
+            break
+        
+        return await self._poll_for_completion(prompt_id, deadline - loop.time())
+    
+    async def _poll_for_completion(self, prompt_id: str, timeout: float) -> Dict[str, Any]:
+        """Poll /history once per second until the prompt finishes
+        
+        History is always checked at least once, even with no time left.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        
+        while True:
+            status = await self.get_generation_status(prompt_id)
+            if status["status"] in ("completed", "error"):
+                return status
+            if loop.time() >= deadline:
+                return {"status": "timeout"}
+            await asyncio.sleep(min(1, deadline - loop.time()))
+    
+    async def close(self):
+        """Close the event listener; connections belong to the shared registry"""
+        await self.listener.close()
+
+
+class ComfyUIWorker:
+    """Load and health bookkeeping for one ComfyUI endpoint"""
+    
+    def __init__(self, client: ComfyUIClient):
+        self.client = client
+        self.queue_depth = 0
+        self.in_flight = 0
+        # Moving-average seconds per generation, keyed by quality tier
+        self.latencies: Dict[str, float] = {}
+        self.consecutive_failures = 0
+        # Non-zero while the breaker is open or half-open
+        self.ejected_until = 0.0
+        self.trial_in_flight = False
+    
+    @property
+    def healthy(self) -> bool:
+        """Whether the breaker is closed or its cool-down has elapsed"""
+        return time.monotonic() >= self.ejected_until
+    
+    @property
+    def half_open(self) -> bool:
+        """Cool-down elapsed but no trial job has succeeded yet"""
+        return self.ejected_until > 0 and self.healthy
+    
+    @property
+    def available(self) -> bool:
+        """Whether a new job may be routed here
+        
+        A half-open worker takes a single trial job; only that job's
+        success closes the breaker.
+        """
+        return self.healthy and not (self.half_open and self.trial_in_flight)
+    
+    def expected_wait(self, quality: str) -> float:
+        """Estimated seconds before a new job of this quality would finish"""
+        known = list(self.latencies.values())
+        latency = self.latencies.get(quality) or (sum(known) / len(known) if known else 10.0)
+        return (max(self.queue_depth, self.in_flight) + 1) * latency
+    
+    def record_success(self, quality: str, duration: float):
+        """Close the breaker and fold the duration into the latency estimate"""
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        previous = self.latencies.get(quality)
+        self.latencies[quality] = duration if previous is None else 0.8 * previous + 0.2 * duration
+    
+    def record_failure(self, threshold: int, eject_seconds: float):
+        """Count a failure, ejecting the worker once the threshold is reached
+        
+        A failure while half-open ejects the worker again straight away.
+        """
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= threshold or self.ejected_until > 0:
+            self.ejected_until = time.monotonic() + eject_seconds
+            logger.warning(f"Ejecting ComfyUI worker {self.client.base_url} for {eject_seconds}s")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Current routing state"""
+        return {
+            "url": self.client.base_url,
+            "healthy": self.healthy,
+            "state": "open" if not self.healthy else "half_open" if self.half_open else "closed",
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "consecutive_failures": self.consecutive_failures,
+            "latencies": {quality: round(value, 2) for quality, value in self.latencies.items()}
+        }
+
+
+class ComfyUIPool:
+    """Routes generations across several ComfyUI endpoints
+    
+    Each job goes to the healthy worker with the lowest expected wait, based
+    on its ``/queue`` depth and observed per-quality latency. Workers that
+    fail repeatedly are ejected for a cool-down period (circuit breaking).
+    After the cool-down a worker gets one trial job, and only a successful
+    trial lets it back into rotation. Jobs whose worker errors out or times
+    out are re-queued on another worker; workflows ComfyUI rejects as
+    invalid are returned to the caller as-is. ``generate_image`` matches
+    ``ComfyUIClient.generate_image`` so the pool can be used anywhere a
+    single client is.
+    """
+    
+    def __init__(
+        self,
+        base_urls: List[str],
+        failure_threshold: int = 3,
+        eject_seconds: float = 30.0,
+        health_interval: float = 5.0,
+        workflow_manager: Optional["WorkflowManager"] = None
+    ):
+        # All workers share one set of compiled templates
+        workflow_manager = workflow_manager or WorkflowManager()
+        self.workers = [ComfyUIWorker(ComfyUIClient(url, workflow_manager)) for url in base_urls]
+        self.failure_threshold = failure_threshold
+        self.eject_seconds = eject_seconds
+        self.health_interval = health_interval
+        self.health_task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start websocket listeners and the background health checker"""
+        for worker in self.workers:
+            worker.client.listener.start()
+        if self.health_task is None or self.health_task.done():
+            self.health_task = asyncio.create_task(self._health_loop())
+    
+    async def _health_loop(self):
+        """Periodically refresh queue depths"""
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.health_interval)
+    
+    async def refresh(self):
+        """Poll every worker's queue depth, recording failures
+        
+        A reachable ``/queue`` does not close an open breaker: a worker can
+        answer HTTP while its jobs hang, so only a trial job decides that.
+        """
+        async def check(worker: ComfyUIWorker):
+            try:
+                worker.queue_depth = await worker.client.get_queue_depth()
+            except Exception as e:
+                logger.warning(f"ComfyUI worker {worker.client.base_url} health check failed: {e}")
+                worker.record_failure(self.failure_threshold, self.eject_seconds)
+        
+        await asyncio.gather(*(check(worker) for worker in self.workers))
+    
+    def pick(self, quality: str, exclude: Optional[set] = None) -> Optional[ComfyUIWorker]:
+        """Choose the available worker with the lowest expected wait"""
+        candidates = [w for w in self.workers if w.available and w not in (exclude or set())]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda w: w.expected_wait(quality))
+    
+    async def generate_image(
+        self,
+        prompt: str,
+        style: str = "photorealistic",
+        quality: str = "standard",
+        workflow_name: str = "default",
+        batch_size: int = 1,
+        download_to: Optional[Path] = None
+    ) -> Dict[str, Any]:
+        """Generate on the least-loaded worker, re-queueing if that worker dies"""
+        tried = set()
+        last_error = "No healthy ComfyUI workers"
+        
+        while True:
+            worker = self.pick(quality, tried)
+            if worker is None:
+                return {"success": False, "error": last_error}
+            tried.add(worker)
+            trial = worker.half_open
+            if trial:
+                worker.trial_in_flight = True
+            
+            worker.in_flight += 1
+            started = time.monotonic()
+            try:
+                result = await worker.client.generate_image(
+                    prompt, style, quality, workflow_name, batch_size, download_to
+                )
+            except FileNotFoundError:
+                raise
+            except ComfyUIValidationError as e:
+                return {"success": False, "error": str(e), "node_errors": e.node_errors}
+            except Exception as e:
+                last_error = str(e)
+                worker.record_failure(self.failure_threshold, self.eject_seconds)
+                RETRIES.inc("comfyui_pool", "worker_error")
+                logger.warning(f"ComfyUI worker {worker.client.base_url} failed, re-queueing: {e}")
+                continue
+            finally:
+                worker.in_flight -= 1
+                if trial:
+                    worker.trial_in_flight = False
+            
+            if result.get("success"):
+                worker.record_success(quality, time.monotonic() - started)
+                result["worker"] = worker.client.base_url
+                return result
+            
+            if result.get("error") == "Generation timeout":
+                # A stalled worker is treated like a dead one. Its prompt is
+                # cancelled first so it cannot finish later and render twice.
+                last_error = result["error"]
+                try:
+                    await worker.client.cancel_prompt(result["prompt_id"])
+                except Exception as e:
+                    logger.warning(f"Could not cancel prompt {result['prompt_id']} on {worker.client.base_url}: {e}")
+                worker.record_failure(self.failure_threshold, self.eject_seconds)
+                RETRIES.inc("comfyui_pool", "timeout")
+                continue
+            
+            # Execution errors come from the workflow itself, not the worker
+            return result
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        """Routing state for every worker"""
+        return [worker.stats() for worker in self.workers]
+    
     async def close(self):
-        """Close the HTTP client"""
-        await self.client.aclose()
+        """Stop health checks and close every worker"""
+        if self.health_task is not None:
+            self.health_task.cancel()
+            try:
+                await self.health_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self.health_task = None
+        await asyncio.gather(*(worker.client.close() for worker in self.workers))
 
 
 # Quality Assurance Module
@@ -210,15 +791,69 @@ class QualityAssurance:
         return f"{original_prompt}, high quality, no artifacts"
 
 
+class CompiledWorkflow:
+    """A parsed workflow template with its patchable nodes located up front
+    
+    Per-request workflows are produced by copying only the top-level dict,
+    each node dict and its ``inputs`` dict; nested values such as node links
+    are shared with the template and never mutated.
+    """
+    
+    def __init__(self, name: str, template: Dict[str, Any]):
+        self.name = name
+        self.template = template
+        self.prompt_nodes = [
+            node_id for node_id, node in template.items()
+            if node.get("class_type") == "CLIPTextEncode"
+            and "positive" in node.get("_meta", {}).get("title", "").lower()
+        ]
+        self.sampler_nodes = [
+            node_id for node_id, node in template.items() if node.get("class_type") == "KSampler"
+        ]
+        self.latent_nodes = [
+            node_id for node_id, node in template.items() if node.get("class_type") == "EmptyLatentImage"
+        ]
+        self.seed_nodes = [
+            node_id for node_id in self.sampler_nodes if "seed" in template[node_id].get("inputs", {})
+        ]
+    
+    def instantiate(self, prompt: str, quality: str = "standard", batch_size: int = 1, seed: Optional[int] = None) -> Dict[str, Any]:
+        """Build a request-specific workflow from the template"""
+        workflow = {
+            node_id: {**node, "inputs": dict(node.get("inputs", {}))}
+            for node_id, node in self.template.items()
+        }
+        
+        for node_id in self.prompt_nodes:
+            workflow[node_id]["inputs"]["text"] = prompt
+        for node_id in self.sampler_nodes:
+            workflow[node_id]["inputs"].update(QUALITY_PRESETS.get(quality, QUALITY_PRESETS["standard"]))
+        for node_id in self.latent_nodes:
+            workflow[node_id]["inputs"]["batch_size"] = batch_size
+        for node_id in self.seed_nodes:
+            # ComfyUI rejects negative seeds, so treat them as "pick one"
+            if seed is not None:
+                workflow[node_id]["inputs"]["seed"] = seed
+            elif workflow[node_id]["inputs"]["seed"] < 0:
+                workflow[node_id]["inputs"]["seed"] = random.randint(0, 2 ** 32 - 1)
+        
+        return workflow
+
+
 # Workflow Manager
 class WorkflowManager:
-    def __init__(self):
+    def __init__(self, workflows_dir: Path = Path("workflows"), check_interval: float = 2.0):
+        self.workflows_dir = workflows_dir
+        self.check_interval = check_interval
         self.workflows = {}
+        self.compiled: Dict[str, CompiledWorkflow] = {}
+        self.mtimes: Dict[str, int] = {}
+        self.last_checked: Dict[str, float] = {}
         self.load_workflows()
     
     def load_workflows(self):
         """Load available workflow templates"""
-        workflows_dir = Path("workflows")
+        workflows_dir = self.workflows_dir
         workflows_dir.mkdir(exist_ok=True)
         
         # Create default workflow if it doesn't exist
@@ -228,9 +863,35 @@ class WorkflowManager:
         
         # Load all workflow files
         for workflow_file in workflows_dir.glob("*.json"):
-            name = workflow_file.stem
-            with open(workflow_file, "r") as f:
-                self.workflows[name] = json.load(f)
+            self._load_workflow(workflow_file.stem, workflow_file)
+    
+    def _load_workflow(self, name: str, path: Path):
+        """Parse and compile one template file"""
+        mtime = path.stat().st_mtime_ns
+        with open(path, "r") as f:
+            self.workflows[name] = json.load(f)
+        self.compiled[name] = CompiledWorkflow(name, self.workflows[name])
+        self.mtimes[name] = mtime
+    
+    def get_compiled(self, name: str) -> CompiledWorkflow:
+        """Get a compiled template, reloading it if the file changed on disk
+        
+        The file is stat()-ed at most once per ``check_interval`` per template.
+        """
+        now = time.monotonic()
+        if now - self.last_checked.get(name, 0.0) >= self.check_interval:
+            self.last_checked[name] = now
+            path = self.workflows_dir / f"{name}.json"
+            if not path.exists():
+                self.workflows.pop(name, None)
+                self.compiled.pop(name, None)
+                self.mtimes.pop(name, None)
+            elif path.stat().st_mtime_ns != self.mtimes.get(name):
+                self._load_workflow(name, path)
+        
+        if name not in self.compiled:
+            raise FileNotFoundError(f"Workflow {name} not found")
+        return self.compiled[name]
     
     def create_default_workflow(self, path: Path):
         """Create a default ComfyUI workflow template"""
@@ -301,7 +962,10 @@ class WorkflowManager:
     
     def get_workflow(self, name: str) -> Optional[Dict[str, Any]]:
         """Get a workflow by name"""
-        return self.workflows.get(name)
+        try:
+            return self.get_compiled(name).template
+        except FileNotFoundError:
+            return None
     
     def list_workflows(self) -> list:
         """List available workflows"""
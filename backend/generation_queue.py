@@ -0,0 +1,261 @@
+"""
+Generation Queue Module
+Bounded, priority-aware job queue in front of the GPU render backend
+"""
+
+import asyncio
+import math
+import time
+import uuid
+import logging
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Deque
+
+from metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Lower value is served first; matches oe_users.subscription_tier
+TIER_PRIORITY = {
+    "enterprise": 0,
+    "professional": 1,
+    "starter": 2,
+    "free": 3
+}
+
+
+class QueueFullError(Exception):
+    """Raised when the generation queue is at capacity"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Generation queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass
+class GenerationJob:
+    """A queued unit of GPU work"""
+    id: str
+    user_id: str
+    tier: str
+    run: Callable[[], Awaitable[Any]]
+    enqueued_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    # Set for jobs submitted through ``run``, which wait on the outcome
+    future: Optional[asyncio.Future] = None
+
+
+class GenerationQueue:
+    """Bounded generation queue with tier priorities and per-user fairness
+
+    Jobs are grouped by subscription tier and always drained from the highest
+    priority tier first. Inside a tier, users are served round-robin so one
+    user submitting a burst cannot starve everyone else in the same tier.
+    """
+
+    def __init__(self, capacity: int = 100, concurrency: int = 2, initial_duration: float = 10.0):
+        self.capacity = capacity
+        self.concurrency = concurrency
+        # Exponentially weighted average job duration, used for ETAs
+        self.avg_duration = initial_duration
+        self.tiers: Dict[int, "OrderedDict[str, Deque[GenerationJob]]"] = {}
+        self.jobs: Dict[str, GenerationJob] = {}
+        self.running: Dict[str, GenerationJob] = {}
+        self.wakeup = asyncio.Event()
+        self.workers: List[asyncio.Task] = []
+        self.counters = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0, "cancelled": 0}
+
+    def submit(
+        self,
+        job_id: str,
+        user_id: str,
+        tier: str,
+        run: Callable[[], Awaitable[Any]],
+        future: Optional[asyncio.Future] = None
+    ) -> int:
+        """Queue a job and return its 1-based position
+
+        Raises QueueFullError when the queue is at capacity.
+        """
+        if len(self.jobs) >= self.capacity:
+            self.counters["rejected"] += 1
+            raise QueueFullError(self.retry_after())
+
+        job = GenerationJob(id=job_id, user_id=user_id, tier=tier, run=run, future=future)
+        priority = TIER_PRIORITY.get(tier, TIER_PRIORITY["free"])
+        users = self.tiers.setdefault(priority, OrderedDict())
+        users.setdefault(user_id, deque()).append(job)
+        self.jobs[job_id] = job
+        self.counters["submitted"] += 1
+        self.wakeup.set()
+        return self.position(job_id)
+
+    async def run(self, job_id: str, user_id: str, tier: str, run: Callable[[], Awaitable[Any]]) -> Any:
+        """Queue a job and wait for its result
+
+        Raises QueueFullError when the queue is at capacity, and re-raises
+        whatever the job raised. If the caller is cancelled while the job
+        is still waiting, the job is dropped from the queue.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.submit(job_id, user_id, tier, run, future)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            self.cancel(job_id)
+            raise
+
+    def cancel(self, job_id: str) -> bool:
+        """Drop a waiting job and return whether it was removed
+
+        A job that is already running is left to finish; its result is
+        discarded once its future has been cancelled.
+        """
+        job = self.jobs.pop(job_id, None)
+        if job is None:
+            return False
+
+        users = self.tiers[TIER_PRIORITY.get(job.tier, TIER_PRIORITY["free"])]
+        jobs = users[job.user_id]
+        jobs.remove(job)
+        if not jobs:
+            del users[job.user_id]
+        self.counters["cancelled"] += 1
+        return True
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is expected to free up"""
+        return max(1, math.ceil(self.avg_duration / self.concurrency))
+
+    def _ordered(self) -> List[GenerationJob]:
+        """Jobs in the order they will be dispatched"""
+        ordered = []
+        for priority in sorted(self.tiers):
+            queues = [list(jobs) for jobs in self.tiers[priority].values()]
+            depth = max((len(q) for q in queues), default=0)
+            for i in range(depth):
+                ordered.extend(q[i] for q in queues if i < len(q))
+        return ordered
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based queue position, or None if the job is not waiting"""
+        if job_id not in self.jobs:
+            return None
+        for index, job in enumerate(self._ordered(), 1):
+            if job.id == job_id:
+                return index
+        return None
+
+    def eta(self, job_id: str) -> Optional[float]:
+        """Estimated seconds until the job finishes"""
+        if job_id in self.running:
+            elapsed = time.monotonic() - self.running[job_id].started_at
+            return round(max(self.avg_duration - elapsed, 0.0), 1)
+
+        position = self.position(job_id)
+        if position is None:
+            return None
+        rounds = (position - 1) // self.concurrency + 1
+        return round((rounds + 0.5) * self.avg_duration, 1)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Queue position and ETA for a job that is still waiting or running"""
+        if job_id in self.running:
+            return {"position": 0, "eta_seconds": self.eta(job_id)}
+        position = self.position(job_id)
+        if position is None:
+            return None
+        return {"position": position, "eta_seconds": self.eta(job_id)}
+
+    def _next_job(self) -> Optional[GenerationJob]:
+        """Pop the next job: highest tier first, round-robin across users"""
+        for priority in sorted(self.tiers):
+            users = self.tiers[priority]
+            if not users:
+                continue
+            user_id, jobs = next(iter(users.items()))
+            job = jobs.popleft()
+            # Rotate the user to the back of their tier
+            del users[user_id]
+            if jobs:
+                users[user_id] = jobs
+            del self.jobs[job.id]
+            return job
+        return None
+
+    async def _worker(self):
+        """Run queued jobs one at a time"""
+        while True:
+            job = self._next_job()
+            if job is None:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            job.started_at = time.monotonic()
+            STAGE_SECONDS.observe(job.started_at - job.enqueued_at, "generation_queue_wait")
+            self.running[job.id] = job
+            try:
+                result = await job.run()
+                self.counters["completed"] += 1
+                if job.future is not None and not job.future.done():
+                    job.future.set_result(result)
+            except Exception as e:
+                logger.error(f"Generation job {job.id} failed: {e}")
+                self.counters["failed"] += 1
+                if job.future is not None and not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                del self.running[job.id]
+                duration = time.monotonic() - job.started_at
+                self.avg_duration = 0.8 * self.avg_duration + 0.2 * duration
+
+    def start(self):
+        """Start the worker tasks"""
+        while len(self.workers) < self.concurrency:
+            self.workers.append(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        """Stop the worker tasks"""
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        for job in list(self.jobs.values()) + list(self.running.values()):
+            if job.future is not None and not job.future.done():
+                job.future.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, running jobs and counters"""
+        return {
+            **self.counters,
+            "queued": len(self.jobs),
+            "running": len(self.running),
+            "capacity": self.capacity,
+            "avg_duration_seconds": round(self.avg_duration, 2)
+        }
+
+
+class QueuedGenerator:
+    """Routes ``generate_image`` calls through a GenerationQueue
+
+    Wraps a render backend such as ``ComfyUIPool`` so renders that do not
+    come from ``/api/generate`` (workflow steps, enhancement passes) count
+    against the same concurrency limit instead of going straight to the GPU.
+    """
+
+    def __init__(self, queue: GenerationQueue, backend: Any, user_id: str, tier: str = "free"):
+        self.queue = queue
+        self.backend = backend
+        self.user_id = user_id
+        self.tier = tier
+
+    async def generate_image(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        """Queue a render and wait for its result"""
+        return await self.queue.run(
+            str(uuid.uuid4()),
+            self.user_id,
+            self.tier,
+            lambda: self.backend.generate_image(*args, **kwargs)
+        )
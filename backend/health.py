@@ -0,0 +1,104 @@
+"""
+Health Module
+Background dependency prober and the liveness, readiness and metrics endpoints
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Any, Optional, Callable, Awaitable, Iterable
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from metrics import metrics
+from periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+class DependencyProber(PeriodicTask):
+    """Checks dependencies on an interval and caches the outcome
+
+    Each check is a cheap coroutine (a model listing, a one-row query) that
+    raises or returns False when the dependency is unavailable. Health
+    endpoints only read the cached results, so probing load is fixed by the
+    interval rather than by how often monitors poll.
+    """
+
+    def __init__(
+        self,
+        checks: Dict[str, Callable[[], Awaitable[Any]]],
+        interval: float = 15.0,
+        timeout: float = 3.0,
+        required: Optional[Iterable[str]] = None
+    ):
+        super().__init__(interval)
+        self.checks = checks
+        self.timeout = timeout
+        self.required = set(checks if required is None else required)
+        self.results: Dict[str, Dict[str, Any]] = {
+            name: {"status": "unknown", "latency_ms": None, "checked_at": None, "error": None}
+            for name in checks
+        }
+
+    async def _probe(self, name: str, check: Callable[[], Awaitable[Any]]):
+        started = time.monotonic()
+        try:
+            ok = await asyncio.wait_for(check(), self.timeout)
+            status, error = ("up", None) if ok is not False else ("down", "check failed")
+        except asyncio.TimeoutError:
+            status, error = "down", f"timed out after {self.timeout}s"
+        except Exception as e:
+            status, error = "down", str(e)
+
+        if status != self.results[name]["status"] and self.results[name]["status"] != "unknown":
+            logger.warning(f"Dependency {name} is now {status}" + (f": {error}" if error else ""))
+        self.results[name] = {
+            "status": status,
+            "latency_ms": round((time.monotonic() - started) * 1000, 1),
+            "checked_at": time.time(),
+            "error": error
+        }
+
+    async def probe(self):
+        """Run every check once, concurrently"""
+        await asyncio.gather(*(self._probe(name, check) for name, check in self.checks.items()))
+
+    async def tick(self):
+        await self.probe()
+
+    def status(self, name: str) -> str:
+        """Last known status of one dependency"""
+        return self.results[name]["status"]
+
+    def ready(self) -> bool:
+        """True when every required dependency was up at the last probe"""
+        return all(self.results[name]["status"] == "up" for name in self.required)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Readiness plus per-dependency results"""
+        return {"ready": self.ready(), "dependencies": self.results}
+
+
+def health_router(prober: DependencyProber) -> APIRouter:
+    """``/healthz``, ``/readyz`` and ``/metrics`` for an app whose readiness ``prober`` tracks"""
+    router = APIRouter()
+
+    @router.get("/healthz")
+    async def healthz():
+        """Liveness: the process is up and serving requests"""
+        return {"status": "ok"}
+
+    @router.get("/readyz")
+    async def readyz():
+        """Readiness from the last background dependency probe"""
+        snapshot = prober.snapshot()
+        return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+    @router.get("/metrics")
+    async def get_metrics():
+        """Prometheus scrape endpoint"""
+        return PlainTextResponse(metrics.render(), media_type=metrics.content_type)
+
+    return router
@@ -0,0 +1,117 @@
+"""
+HTTP Clients Module
+Process-wide pool of outbound HTTP clients, one per origin
+"""
+
+import logging
+from typing import Dict, Any, Optional, Callable
+
+import httpx
+
+from oe_config import (
+    OE_HTTP2, OE_HTTP_MAX_CONNECTIONS, OE_HTTP_MAX_KEEPALIVE, OE_HTTP_KEEPALIVE_EXPIRY
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  # httpx only negotiates HTTP/2 when h2 is installed
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def origin_of(url: str) -> str:
+    """scheme://host[:port] for a URL"""
+    parsed = httpx.URL(url)
+    port = f":{parsed.port}" if parsed.port else ""
+    return f"{parsed.scheme}://{parsed.host}{port}"
+
+
+class HTTPClientRegistry:
+    """Hands out one pooled, keep-alive ``httpx.AsyncClient`` per origin
+
+    Every integration talking to the same host shares a connection pool, so
+    many accounts on one platform reuse the same sockets and TLS sessions
+    instead of each opening their own. The registry owns the clients; callers
+    must not close them and should call ``close`` once at shutdown.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = OE_HTTP_MAX_CONNECTIONS,
+        max_keepalive: int = OE_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry: float = OE_HTTP_KEEPALIVE_EXPIRY,
+        http2: bool = OE_HTTP2
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.http2 = http2 and HTTP2_AVAILABLE
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but h2 is not installed, using HTTP/1.1")
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.transports: Dict[str, httpx.AsyncHTTPTransport] = {}
+        self.request_counts: Dict[str, int] = {}
+
+    def client(
+        self,
+        url: str,
+        timeout: float = 30.0,
+        wrap: Optional[Callable[[httpx.AsyncBaseTransport], httpx.AsyncBaseTransport]] = None
+    ) -> httpx.AsyncClient:
+        """Get the shared client for a URL's origin
+
+        ``wrap`` lets the first caller layer middleware (such as rate
+        limiting) over the pooled transport.
+        """
+        origin = origin_of(url)
+        client = self.clients.get(origin)
+        if client is not None and not client.is_closed:
+            return client
+
+        transport = httpx.AsyncHTTPTransport(http2=self.http2, limits=self.limits)
+        self.transports[origin] = transport
+        self.request_counts.setdefault(origin, 0)
+
+        async def count_request(request: httpx.Request):
+            self.request_counts[origin] += 1
+
+        client = httpx.AsyncClient(
+            timeout=timeout,
+            transport=wrap(transport) if wrap else transport,
+            event_hooks={"request": [count_request]}
+        )
+        self.clients[origin] = client
+        return client
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection pool utilization per origin"""
+        origins = {}
+        for origin, transport in self.transports.items():
+            # httpcore does not expose pool state publicly
+            connections = getattr(getattr(transport, "_pool", None), "connections", [])
+            idle = sum(1 for connection in connections if connection.is_idle())
+            origins[origin] = {
+                "connections": len(connections),
+                "active": len(connections) - idle,
+                "idle": idle,
+                "http2": sum(1 for connection in connections if connection.info().startswith("HTTP/2")),
+                "requests": self.request_counts.get(origin, 0),
+                "max_connections": self.limits.max_connections,
+                "utilization": round((len(connections) - idle) / self.limits.max_connections, 4) if self.limits.max_connections else 0.0
+            }
+        return {"http2_enabled": self.http2, "origins": origins}
+
+    async def close(self):
+        """Close every pooled client"""
+        for client in self.clients.values():
+            await client.aclose()
+        self.clients.clear()
+        self.transports.clear()
+
+
+# Shared by every integration in the process
+http_clients = HTTPClientRegistry()
@@ -0,0 +1,187 @@
+"""
+LLM Cache Module
+Content-addressed response cache for Ollama calls
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+# Buffered access-time updates written in one statement
+TOUCH_FLUSH_SIZE = 100
+
+
+class LLMResponseCache:
+    """Two-tier response cache keyed on (endpoint, model, payload, options)
+
+    The first tier is an in-process LRU. When ``disk_path`` is set, entries
+    are also written to a SQLite file so they survive restarts; disk hits
+    are promoted back into memory. SQLite work runs in a worker thread, and
+    access times from disk hits are buffered and written with the next
+    batch rather than committed on every lookup.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        disk_path: Optional[Path] = None,
+        max_disk_entries: int = 100000
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.counters = {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0}
+        self.db: Optional[sqlite3.Connection] = None
+        self.db_lock = threading.Lock()
+        self._disk_writes = 0
+        # key -> accessed_at for disk hits not yet written back
+        self._touched: Dict[str, float] = {}
+
+        if disk_path:
+            self.db = sqlite3.connect(str(disk_path), check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS oe_llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_oe_llm_cache_accessed_at ON oe_llm_cache(accessed_at)"
+            )
+            self.db.commit()
+
+    @staticmethod
+    def make_key(endpoint: str, model: str, payload: Any, options: Optional[Dict[str, Any]] = None) -> str:
+        """Hash a request into a stable cache key"""
+        material = json.dumps(
+            {"endpoint": endpoint, "model": model, "payload": payload, "options": options or {}},
+            sort_keys=True,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached response, checking memory then disk"""
+        now = time.time()
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self.entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return value
+            del self.entries[key]
+
+        if self.db is not None:
+            row = await asyncio.to_thread(self._disk_get, key)
+            if row and row[1] > now:
+                value = json.loads(row[0])
+                self._touched[key] = now
+                if len(self._touched) >= TOUCH_FLUSH_SIZE:
+                    await asyncio.to_thread(self._flush_touched, self._take_touched())
+                self._remember(key, row[1], value)
+                self.counters["hits"] += 1
+                self.counters["disk_hits"] += 1
+                return value
+
+        self.counters["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        """Store a response in every configured tier"""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        self._remember(key, expires_at, value)
+
+        if self.db is not None:
+            self._touched.pop(key, None)
+            await asyncio.to_thread(
+                self._disk_set, key, json.dumps(value), expires_at, now, self._take_touched()
+            )
+
+    def _take_touched(self) -> Dict[str, float]:
+        """Hand the buffered access times to a writer, on the event loop thread"""
+        touched, self._touched = self._touched, {}
+        return touched
+
+    def _disk_get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self.db_lock:
+            return self.db.execute(
+                "SELECT value, expires_at FROM oe_llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _disk_set(self, key: str, value: str, expires_at: float, now: float, touched: Dict[str, float]):
+        with self.db_lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO oe_llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now)
+            )
+            self._write_touched(touched)
+            self._disk_writes += 1
+            # Trimming is a table scan, so only do it every so often
+            if self._disk_writes % 100 == 0:
+                self._trim_disk(now)
+            self.db.commit()
+
+    def _write_touched(self, touched: Dict[str, float]):
+        """Write buffered access times; the caller holds the lock and commits"""
+        if touched:
+            self.db.executemany(
+                "UPDATE oe_llm_cache SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in touched.items()]
+            )
+
+    def _flush_touched(self, touched: Dict[str, float]):
+        with self.db_lock:
+            self._write_touched(touched)
+            self.db.commit()
+
+    def _remember(self, key: str, expires_at: float, value: Dict[str, Any]):
+        """Insert into the LRU tier, evicting the least recently used entries"""
+        self.entries[key] = (expires_at, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _trim_disk(self, now: float):
+        """Drop expired rows and enforce the on-disk size limit"""
+        self.db.execute("DELETE FROM oe_llm_cache WHERE expires_at <= ?", (now,))
+        self.db.execute(
+            "DELETE FROM oe_llm_cache WHERE key IN ("
+            "SELECT key FROM oe_llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current sizes"""
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.entries),
+            "disk_enabled": self.db is not None
+        }
+
+    def clear(self):
+        """Drop all cached responses"""
+        self.entries.clear()
+        if self.db is not None:
+            with self.db_lock:
+                self._touched.clear()
+                self.db.execute("DELETE FROM oe_llm_cache")
+                self.db.commit()
+
+    def close(self):
+        """Close the on-disk tier"""
+        if self.db is not None:
+            self._flush_touched(self._take_touched())
+            self.db.close()
+            self.db = None
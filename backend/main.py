@@ -7,17 +7,83 @@ import uuid
 from datetime import datetime
 import asyncio
 import os
-from comfyui_integration import ComfyUIClient, QualityAssurance, WorkflowManager
+from supabase import create_client
+from comfyui_integration import ComfyUIPool, QualityAssurance, WorkflowManager
 from platform_integrations import PlatformManager, OnlyFansIntegration, FanslyIntegration, FeetFinderIntegration
+from generation_queue import GenerationQueue, QueueFullError, QueuedGenerator
+from workflow_automation import WorkflowEngine
+from workflow_store import SQLiteWorkflowStore
+from artifact_store import ArtifactStore
+from storage_ledger import StorageLedger
+from oe_config import (
+    OETables, OE_SUPABASE_URL, OE_SUPABASE_SERVICE_KEY, OE_COMFYUI_URLS,
+    OE_GENERATION_QUEUE_SIZE, OE_GENERATION_CONCURRENCY, OE_WORKFLOW_STORE_PATH,
+    OE_HEALTH_PROBE_INTERVAL, OE_HEALTH_PROBE_TIMEOUT, OE_STORAGE_BASE, OE_STORAGE_RECONCILE_INTERVAL
+)
+from oe_database import OEDatabase
+from http_clients import http_clients
+from health import DependencyProber, health_router
+from metrics import metrics
 
 app = FastAPI(title="OnlyEngine.x API", version="1.0.0")
 security = HTTPBearer()
 
 # Initialize services
-comfyui_client = ComfyUIClient(os.getenv("COMFYUI_URL", "http://localhost:8188"))
-quality_assurance = QualityAssurance()
 workflow_manager = WorkflowManager()
+comfyui_pool = ComfyUIPool(OE_COMFYUI_URLS, workflow_manager=workflow_manager)
+quality_assurance = QualityAssurance()
 platform_manager = PlatformManager()
+generation_queue = GenerationQueue(capacity=OE_GENERATION_QUEUE_SIZE, concurrency=OE_GENERATION_CONCURRENCY)
+db = OEDatabase(create_client(OE_SUPABASE_URL, OE_SUPABASE_SERVICE_KEY))
+workflow_store = SQLiteWorkflowStore(OE_WORKFLOW_STORE_PATH)
+storage_ledger = StorageLedger(OE_STORAGE_BASE, reconcile_interval=OE_STORAGE_RECONCILE_INTERVAL)
+artifact_store = ArtifactStore(OE_STORAGE_BASE / "generated", ledger=storage_ledger)
+# Workflow renders share the generation queue's GPU concurrency limit with API jobs
+workflow_renderer = QueuedGenerator(generation_queue, comfyui_pool, user_id="workflow_engine", tier="professional")
+workflow_engine = WorkflowEngine(
+    workflow_renderer, quality_assurance, platform_manager, store=workflow_store, artifact_store=artifact_store
+)
+
+async def comfyui_available() -> bool:
+    """At least one render worker answers /queue and is not ejected"""
+    answers = await asyncio.gather(
+        *(worker.client.get_queue_depth() for worker in comfyui_pool.workers),
+        return_exceptions=True
+    )
+    return any(
+        not isinstance(answer, Exception) and worker.healthy
+        for worker, answer in zip(comfyui_pool.workers, answers)
+    )
+
+metrics.gauge(
+    "oe_generation_queue_jobs", "Generation jobs by state", ("state",),
+    collect=lambda: {("queued",): len(generation_queue.jobs), ("running",): len(generation_queue.running)}
+)
+metrics.gauge(
+    "oe_comfyui_worker_in_flight", "Generations currently running per ComfyUI worker", ("worker",),
+    collect=lambda: {(worker.client.base_url,): worker.in_flight for worker in comfyui_pool.workers}
+)
+metrics.gauge(
+    "oe_comfyui_worker_queue_depth", "Last polled ComfyUI queue depth per worker", ("worker",),
+    collect=lambda: {(worker.client.base_url,): worker.queue_depth for worker in comfyui_pool.workers}
+)
+metrics.gauge(
+    "oe_storage_bytes", "Bytes under the storage root, as tracked by the storage ledger",
+    collect=lambda: {(): storage_ledger.bytes}
+)
+metrics.gauge(
+    "oe_workflows_running", "Workflows currently executing",
+    collect=lambda: {(): len(workflow_engine.running_workflows)}
+)
+
+health_prober = DependencyProber(
+    {
+        "supabase": lambda: db.repo(OETables.USERS).select("id", limit=1),
+        "comfyui": comfyui_available
+    },
+    interval=OE_HEALTH_PROBE_INTERVAL,
+    timeout=OE_HEALTH_PROBE_TIMEOUT
+)
 
 # Configure CORS
 app.add_middleware(
@@ -34,6 +100,7 @@ class GenerationRequest(BaseModel):
     style: str = "photorealistic"
     quality: str = "standard"
     workflow: str = "comfyui"
+    user_id: Optional[str] = None
 
 class TargetingRequest(BaseModel):
     content_id: str
@@ -50,14 +117,62 @@ class ScheduleRequest(BaseModel):
 generations = {}
 schedules = {}
 
+@app.on_event("startup")
+async def startup():
+    """Start the ComfyUI worker pool and the generation workers"""
+    comfyui_pool.start()
+    generation_queue.start()
+    health_prober.start()
+    storage_ledger.start()
+    await workflow_engine.recover_workflows()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop workers and close outbound connections"""
+    await health_prober.stop()
+    await storage_ledger.stop()
+    await generation_queue.stop()
+    db.close()
+    workflow_store.close()
+    await comfyui_pool.close()
+    await platform_manager.close_all()
+    await http_clients.close()
+
+app.include_router(health_router(health_prober))
+
 @app.get("/")
 async def root():
     return {"message": "OnlyEngine.x API", "status": "online"}
 
+async def get_subscription_tier(user_id: Optional[str]) -> str:
+    """Look up a user's subscription tier, defaulting to free"""
+    if not user_id:
+        return "free"
+    try:
+        user = await db.repo(OETables.USERS).find_one({"id": user_id}, columns="subscription_tier")
+    except Exception:
+        return "free"
+    return (user or {}).get("subscription_tier") or "free"
+
 @app.post("/api/generate")
 async def generate_content(request: GenerationRequest):
     """Generate content using ComfyUI workflow"""
     generation_id = str(uuid.uuid4())
+    tier = await get_subscription_tier(request.user_id)
+    
+    try:
+        position = generation_queue.submit(
+            generation_id,
+            request.user_id or "anonymous",
+            tier,
+            lambda: process_generation(generation_id)
+        )
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Generation queue is full",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     
     # Store generation request
     generations[generation_id] = {
@@ -66,19 +181,20 @@ async def generate_content(request: GenerationRequest):
         "style": request.style,
         "quality": request.quality,
         "workflow": request.workflow,
-        "status": "processing",
+        "status": "queued",
         "created_at": datetime.utcnow().isoformat(),
         "image_url": None,
         "metadata": {}
     }
     
-    # Simulate async processing
-    asyncio.create_task(process_generation(generation_id))
-    
     return {
         "id": generation_id,
-        "status": "processing",
-        "message": "Generation started"
+        "status": "queued",
+        "message": "Generation queued",
+        "queue": {
+            "position": position,
+            "eta_seconds": generation_queue.eta(generation_id)
+        }
     }
 
 @app.get("/api/generate/{generation_id}")
@@ -87,10 +203,15 @@ async def get_generation_status(generation_id: str):
     if generation_id not in generations:
         raise HTTPException(status_code=404, detail="Generation not found")
     
-    return generations[generation_id]
+    generation = dict(generations[generation_id])
+    queue_status = generation_queue.status(generation_id)
+    if queue_status:
+        generation["queue"] = queue_status
+    return generation
 
 async def process_generation(generation_id: str):
     """Simulate content generation process"""
+    generations[generation_id]["status"] = "processing"
     await asyncio.sleep(5)  # Simulate processing time
     
     # Update generation status
@@ -11,6 +11,7 @@ OE_DATABASE_URL = os.getenv("OE_DATABASE_URL", "postgresql://postgres:postgres@1
 OE_DATABASE_NAME = "onlyengine"
 OE_DATABASE_HOST = "127.0.0.1"
 OE_DATABASE_PORT = 54322
+OE_DB_MAX_WORKERS = int(os.getenv("OE_DB_MAX_WORKERS", "16"))  # Concurrent Supabase queries
 
 # Supabase Configuration  
 OE_SUPABASE_URL = os.getenv("OE_SUPABASE_URL", "http://127.0.0.1:54321")
@@ -31,13 +32,67 @@ OE_API_VERSION = "2.1.0"
 # AI Services
 OE_OLLAMA_URL = os.getenv("OE_OLLAMA_URL", "http://localhost:11434")
 OE_COMFYUI_URL = os.getenv("OE_COMFYUI_URL", "http://localhost:8188")
+# Comma-separated list of ComfyUI render boxes for the worker pool
+OE_COMFYUI_URLS = [url.strip() for url in os.getenv("OE_COMFYUI_URLS", os.getenv("COMFYUI_URL", OE_COMFYUI_URL)).split(",") if url.strip()]
+OE_COMFYUI_HISTORY_POLL_SECONDS = float(os.getenv("OE_COMFYUI_HISTORY_POLL_SECONDS", "10"))  # /history check while waiting on websocket events
+OE_COMFYUI_TIMEOUT_BASE_SECONDS = float(os.getenv("OE_COMFYUI_TIMEOUT_BASE_SECONDS", "30"))  # model load and VAE decode allowance per prompt
+OE_COMFYUI_TIMEOUT_PER_STEP_SECONDS = float(os.getenv("OE_COMFYUI_TIMEOUT_PER_STEP_SECONDS", "1.0"))  # per sampler step, per image in the batch
+
+# LLM Response Cache
+OE_LLM_CACHE_SIZE = int(os.getenv("OE_LLM_CACHE_SIZE", "1024"))
+OE_LLM_CACHE_TTL = int(os.getenv("OE_LLM_CACHE_TTL", "3600"))  # seconds
+OE_LLM_CACHE_PATH = os.getenv("OE_LLM_CACHE_PATH")  # SQLite file; unset keeps the cache in memory only
+
+# Moderation Batching
+OE_MODERATION_BATCH_SIZE = int(os.getenv("OE_MODERATION_BATCH_SIZE", "16"))
+OE_MODERATION_BATCH_WAIT_MS = float(os.getenv("OE_MODERATION_BATCH_WAIT_MS", "5"))
+
+# Generation Queue
+OE_GENERATION_QUEUE_SIZE = int(os.getenv("OE_GENERATION_QUEUE_SIZE", "100"))
+OE_GENERATION_CONCURRENCY = int(os.getenv("OE_GENERATION_CONCURRENCY", "2"))  # Jobs handed to ComfyUI at once
+
+# Outbound HTTP connection pools (one per origin)
+OE_HTTP2 = os.getenv("OE_HTTP2", "true").lower() == "true"
+OE_HTTP_MAX_CONNECTIONS = int(os.getenv("OE_HTTP_MAX_CONNECTIONS", "100"))
+OE_HTTP_MAX_KEEPALIVE = int(os.getenv("OE_HTTP_MAX_KEEPALIVE", "20"))
+OE_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("OE_HTTP_KEEPALIVE_EXPIRY", "30"))  # seconds
+
+# Platform Fan-out
+OE_PLATFORM_TIMEOUT = float(os.getenv("OE_PLATFORM_TIMEOUT", "30"))  # seconds per platform call
+OE_PLATFORM_DEADLINE = float(os.getenv("OE_PLATFORM_DEADLINE", "60"))  # seconds for the whole fan-out
+OE_PLATFORM_MAX_RETRIES = int(os.getenv("OE_PLATFORM_MAX_RETRIES", "4"))
+OE_UPLOAD_CHUNK_SIZE = int(os.getenv("OE_UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))  # bytes held in memory per upload
+OE_UPLOAD_CHUNK_RETRIES = int(os.getenv("OE_UPLOAD_CHUNK_RETRIES", "5"))
+# (requests per second, burst) per platform and endpoint class
+OE_PLATFORM_RATE_LIMITS = {
+    # "upload" paces new uploads and sessions; "chunk" paces PUTs into an open session
+    "onlyfans": {"upload": (0.2, 2), "chunk": (5.0, 10), "schedule": (1.0, 5), "read": (2.0, 10), "write": (1.0, 5)},
+    "fansly": {"upload": (0.5, 3), "chunk": (5.0, 10), "schedule": (1.0, 5), "read": (3.0, 10), "write": (1.0, 5)},
+    "feetfinder": {"upload": (0.5, 3), "chunk": (5.0, 10), "schedule": (1.0, 5), "read": (3.0, 10), "write": (1.0, 5)},
+    "default": {"default": (1.0, 5)}
+}
+
+# Health Probes
+OE_HEALTH_PROBE_INTERVAL = float(os.getenv("OE_HEALTH_PROBE_INTERVAL", "15"))  # seconds
+OE_HEALTH_PROBE_TIMEOUT = float(os.getenv("OE_HEALTH_PROBE_TIMEOUT", "3"))  # seconds per check
+
+# Content Listing
+OE_CONTENT_PAGE_SIZE = int(os.getenv("OE_CONTENT_PAGE_SIZE", "20"))
+OE_CONTENT_PAGE_MAX = int(os.getenv("OE_CONTENT_PAGE_MAX", "100"))
+OE_CONTENT_CACHE_TTL = float(os.getenv("OE_CONTENT_CACHE_TTL", "5"))  # seconds
+
+# Analytics Rollup
+OE_ANALYTICS_ROLLUP_INTERVAL = float(os.getenv("OE_ANALYTICS_ROLLUP_INTERVAL", "60"))  # seconds
 
 # Storage Configuration
-OE_STORAGE_BASE = Path("/Users/izverg/projects/OnlyEngine.ai/storage")
-OE_STORAGE_BASE.mkdir(exist_ok=True)
+OE_STORAGE_BASE = Path(os.getenv("OE_STORAGE_PATH", "/Users/izverg/projects/OnlyEngine.ai/storage"))
+OE_STORAGE_BASE.mkdir(parents=True, exist_ok=True)
 (OE_STORAGE_BASE / "generated").mkdir(exist_ok=True)
 (OE_STORAGE_BASE / "uploads").mkdir(exist_ok=True)
 (OE_STORAGE_BASE / "temp").mkdir(exist_ok=True)
+OE_WORKFLOW_STORE_PATH = Path(os.getenv("OE_WORKFLOW_STORE_PATH", str(OE_STORAGE_BASE / "workflows.db")))
+OE_WORKFLOW_STEP_CONCURRENCY = int(os.getenv("OE_WORKFLOW_STEP_CONCURRENCY", "4"))  # Steps running at once across all workflows
+OE_STORAGE_RECONCILE_INTERVAL = float(os.getenv("OE_STORAGE_RECONCILE_INTERVAL", "3600"))  # seconds between full storage walks
 
 # Table Names (all with oe_ prefix)
 class OETables:
@@ -45,6 +100,8 @@ class OETables:
     CONTENT = "oe_content"
     SCHEDULES = "oe_schedules"
     ANALYTICS = "oe_analytics"
+    CONTENT_STATS = "oe_content_stats"
+    USER_STATS = "oe_user_stats"
     WORKFLOWS = "oe_workflows"
     PLATFORMS = "oe_platforms"
     TEMPLATES = "oe_templates"
@@ -0,0 +1,147 @@
+"""
+Database Module
+Async data-access layer for the OnlyEngine.x Supabase tables
+"""
+
+import asyncio
+import base64
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Callable, Tuple
+
+from supabase import Client
+
+from oe_config import OE_DB_MAX_WORKERS
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """Opaque keyset cursor pointing just past a row"""
+    raw = json.dumps({"created_at": row["created_at"], "id": row["id"]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, str]:
+    """Decode a cursor from ``encode_cursor``; raises ValueError if malformed
+
+    The values end up inside a PostgREST filter string, so they are parsed
+    as a UUID and an ISO timestamp and re-serialized rather than passed on
+    as given.
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return {
+            "created_at": datetime.fromisoformat(data["created_at"]).isoformat(),
+            "id": str(uuid.UUID(data["id"]))
+        }
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+class OEDatabase:
+    """Runs blocking Supabase queries on a bounded thread pool
+
+    The supabase-py client is synchronous, so every ``execute()`` is handed
+    to a dedicated executor instead of running on the event loop. The pool
+    size caps how many round trips can be in flight at once.
+    """
+
+    def __init__(self, client: Client, max_workers: int = OE_DB_MAX_WORKERS):
+        self.client = client
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="oe-db")
+        self.repositories: Dict[str, "OERepository"] = {}
+
+    def repo(self, table: str) -> "OERepository":
+        """Get the repository for an ``OETables`` table name"""
+        if table not in self.repositories:
+            self.repositories[table] = OERepository(self, table)
+        return self.repositories[table]
+
+    async def run(self, build: Callable[[Client], Any]) -> Any:
+        """Build a query against the client and execute it off the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: build(self.client).execute())
+
+    def close(self):
+        """Shut down the query executor"""
+        self.executor.shutdown(wait=False)
+
+
+class OERepository:
+    """Query helpers for a single ``oe_`` table"""
+
+    def __init__(self, db: OEDatabase, table: str):
+        self.db = db
+        self.table = table
+
+    async def query(self, build: Callable[[Any], Any]) -> Any:
+        """Execute an arbitrary query chain built on this table"""
+        return await self.db.run(lambda client: build(client.table(self.table)))
+
+    async def insert(self, row: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Insert a row and return the inserted records"""
+        result = await self.query(lambda table: table.insert(row))
+        return result.data or []
+
+    async def select(
+        self,
+        columns: str = "*",
+        filters: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Select rows matching equality filters"""
+        def build(table):
+            query = table.select(columns)
+            for column, value in (filters or {}).items():
+                query = query.eq(column, value)
+            if limit is not None:
+                query = query.limit(limit)
+            return query
+
+        result = await self.query(build)
+        return result.data or []
+
+    async def page(
+        self,
+        columns: str,
+        filters: Optional[Dict[str, Any]] = None,
+        cursor: Optional[str] = None,
+        limit: int = 20
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Newest-first keyset page ordered by (created_at, id)
+        
+        Returns the rows and the cursor for the next page, or None on the
+        last page. ``columns`` must include created_at and id.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        
+        def build(table):
+            query = table.select(columns)
+            for column, value in (filters or {}).items():
+                query = query.eq(column, value)
+            if after:
+                created_at = after["created_at"]
+                query = query.or_(
+                    f'created_at.lt."{created_at}",'
+                    f'and(created_at.eq."{created_at}",id.lt.{after["id"]})'
+                )
+            # Fetch one extra row to know whether another page exists
+            return query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1)
+        
+        result = await self.query(build)
+        rows = result.data or []
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, encode_cursor(rows[-1])
+        return rows, None
+    
+    async def find_one(self, filters: Dict[str, Any], columns: str = "*") -> Optional[Dict[str, Any]]:
+        """Fetch a single row matching equality filters"""
+        rows = await self.select(columns, filters, limit=1)
+        return rows[0] if rows else None
+
+    async def count(self, column: str = "id") -> int:
+        """Exact row count for the table"""
+        result = await self.query(lambda table: table.select(column, count="exact").limit(1))
+        return result.count or 0
@@ -5,15 +5,31 @@ Handles communication with Ollama for LLM operations
 
 import httpx
 import json
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
 import asyncio
+from llm_cache import LLMResponseCache
+from http_clients import http_clients
 
 class OllamaClient:
-    def __init__(self, base_url: str = "http://localhost:11434"):
+    def __init__(self, base_url: str = "http://localhost:11434", cache: Optional[LLMResponseCache] = None):
         self.base_url = base_url
-        self.client = httpx.AsyncClient(timeout=60.0)
-        
-    async def generate(self, prompt: str, model: str = "mistral", stream: bool = False) -> Dict[str, Any]:
+        self.cache = cache
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        self.call_counters = {"upstream_calls": 0, "coalesced_calls": 0}
+        
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled client for the Ollama host"""
+        return http_clients.client(self.base_url, timeout=60.0)
+    
+    async def generate(
+        self,
+        prompt: str,
+        model: str = "mistral",
+        stream: bool = False,
+        options: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
         """Generate a response using Ollama"""
         url = f"{self.base_url}/api/generate"
         
@@ -22,17 +38,18 @@ class OllamaClient:
             "prompt": prompt,
             "stream": stream
         }
+        if options:
+            data["options"] = options
         
-        try:
-            response = await self.client.post(url, json=data)
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {"error": f"Ollama error: {response.status_code}"}
-        except Exception as e:
-            return {"error": str(e)}
+        return await self._post_cached(url, data, "generate", model, prompt, options, use_cache and not stream)
     
-    async def chat(self, messages: List[Dict[str, str]], model: str = "mistral") -> Dict[str, Any]:
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "mistral",
+        options: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
         """Chat with Ollama using conversation history"""
         url = f"{self.base_url}/api/chat"
         
@@ -41,16 +58,126 @@ class OllamaClient:
             "messages": messages,
             "stream": False
         }
+        if options:
+            data["options"] = options
         
+        return await self._post_cached(url, data, "chat", model, messages, options, use_cache)
+    
+    async def generate_stream(
+        self,
+        prompt: str,
+        model: str = "mistral",
+        options: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a generation as Ollama's NDJSON chunks arrive
+        
+        Yields the parsed chunk dicts; the last one has ``done`` set. A cached
+        response is replayed as a single final chunk, and a completed stream
+        is stored in the cache like a regular ``generate`` call.
+        """
+        url = f"{self.base_url}/api/generate"
+        
+        data = {
+            "model": model,
+            "prompt": prompt,
+            "stream": True
+        }
+        if options:
+            data["options"] = options
+        
+        key = None
+        if self.cache is not None and use_cache:
+            key = LLMResponseCache.make_key("generate", model, prompt, options)
+            cached = await self.cache.get(key)
+            if cached is not None:
+                yield {**cached, "done": True}
+                return
+        
+        parts: List[str] = []
+        try:
+            async with self.client.stream("POST", url, json=data) as response:
+                if response.status_code != 200:
+                    yield {"error": f"Ollama error: {response.status_code}", "done": True}
+                    return
+                
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        yield {**chunk, "done": True}
+                        return
+                    parts.append(chunk.get("response", ""))
+                    if chunk.get("done"):
+                        final = {**chunk, "response": "".join(parts)}
+                        if key is not None:
+                            await self.cache.set(key, final)
+                        yield chunk
+                        return
+                    yield chunk
+        except Exception as e:
+            yield {"error": str(e), "done": True}
+    
+    async def _post_cached(
+        self,
+        url: str,
+        data: Dict[str, Any],
+        endpoint: str,
+        model: str,
+        payload: Any,
+        options: Optional[Dict[str, Any]],
+        use_cache: bool
+    ) -> Dict[str, Any]:
+        """POST to Ollama, serving identical requests from the cache or a shared in-flight call"""
+        if not use_cache:
+            return await self._post(url, data, None)
+        
+        key = LLMResponseCache.make_key(endpoint, model, payload, options)
+        if self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        # Single-flight: concurrent identical requests await one upstream call.
+        # The call runs in its own task and is shielded, so a cancelled caller
+        # does not cancel it for everyone else.
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._post(url, data, key))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        else:
+            self.call_counters["coalesced_calls"] += 1
+        
+        return await asyncio.shield(task)
+    
+    async def _post(self, url: str, data: Dict[str, Any], key: Optional[str]) -> Dict[str, Any]:
+        """Make one upstream call, caching successful responses under ``key``"""
+        self.call_counters["upstream_calls"] += 1
         try:
             response = await self.client.post(url, json=data)
             if response.status_code == 200:
-                return response.json()
+                result = response.json()
+                # Errors are never cached so a recovered model is picked up immediately
+                if key is not None and self.cache is not None and "error" not in result:
+                    await self.cache.set(key, result)
+                return result
             else:
                 return {"error": f"Ollama error: {response.status_code}"}
         except Exception as e:
             return {"error": str(e)}
     
+    async def list_models(self) -> List[str]:
+        """Names of locally available models; a cheap liveness check"""
+        response = await self.client.get(f"{self.base_url}/api/tags", timeout=5.0)
+        response.raise_for_status()
+        return [model["name"] for model in response.json().get("models", [])]
+    
+    def call_stats(self) -> Dict[str, Any]:
+        """Upstream vs coalesced call counters"""
+        return {**self.call_counters, "in_flight": len(self.in_flight)}
+    
     async def generate_image_prompt(self, description: str) -> str:
         """Generate an optimized image generation prompt"""
         system_prompt = """You are an expert at creating detailed prompts for image generation AI. 
@@ -154,8 +281,9 @@ class OllamaClient:
         return workflow_steps  # Return original if optimization fails
     
     async def close(self):
-        """Close the HTTP client"""
-        await self.client.aclose()
+        """Close the response cache; connections belong to the shared registry"""
+        if self.cache is not None:
+            self.cache.close()
 
 
 class ContentModerationAI:
@@ -197,6 +325,122 @@ class ContentModerationAI:
             "concerns": [],
             "suggestions": []
         }
+    
+    async def check_batch(self, contents: List[str]) -> List[Dict[str, Any]]:
+        """Check several pieces of content with a single model invocation
+        
+        Falls back to one ``check_content`` call per item if the model's
+        reply cannot be matched back to every item.
+        """
+        if len(contents) == 1:
+            return [await self.check_content(contents[0])]
+        
+        items = "\n".join(f'{i}. "{content}"' for i, content in enumerate(contents, 1))
+        prompt = f"""Analyze each of these numbered content items for potential policy violations:
+        {items}
+        
+        Check each item for:
+        1. Inappropriate content
+        2. Copyright concerns
+        3. Misleading information
+        4. Quality standards
+        
+        Respond with a JSON array containing exactly one object per item, in order: [
+            {{"item": 1, "approved": true/false, "concerns": [], "suggestions": []}}
+        ]"""
+        
+        response = await self.ollama.generate(prompt)
+        
+        if "response" in response:
+            try:
+                import re
+                json_match = re.search(r'\[.*\]', response["response"], re.DOTALL)
+                if json_match:
+                    verdicts = json.loads(json_match.group())
+                    if len(verdicts) == len(contents) and all(isinstance(v, dict) for v in verdicts):
+                        by_item = {v.get("item"): v for v in verdicts}
+                        if set(by_item) == set(range(1, len(contents) + 1)):
+                            verdicts = [by_item[i] for i in range(1, len(contents) + 1)]
+                        return [
+                            {
+                                "approved": v.get("approved", True),
+                                "concerns": v.get("concerns", []),
+                                "suggestions": v.get("suggestions", [])
+                            }
+                            for v in verdicts
+                        ]
+            except:
+                pass
+        
+        return list(await asyncio.gather(*(self.check_content(content) for content in contents)))
+
+
+class ModerationBatcher:
+    """Micro-batches concurrent ``check_content`` calls into ``check_batch`` requests
+    
+    Pending checks are held for up to ``max_wait_ms`` or until ``max_batch_size``
+    items are queued, then sent as one prompt and demultiplexed back to each
+    waiting caller. Exposes the same ``check_content`` interface as
+    ``ContentModerationAI`` so it can be dropped in front of it.
+    """
+    
+    def __init__(self, moderator: ContentModerationAI, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        self.moderator = moderator
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.pending: List[tuple] = []
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.batch_counters = {"batches": 0, "items": 0}
+    
+    async def check_content(self, content: str) -> Dict[str, Any]:
+        """Queue content for the next moderation batch and wait for its verdict"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((content, future))
+        
+        if len(self.pending) >= self.max_batch_size:
+            self._flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.max_wait, self._flush)
+        
+        return await future
+    
+    def _flush(self):
+        """Send everything pending as one batch"""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        
+        batch, self.pending = self.pending, []
+        if batch:
+            asyncio.ensure_future(self._run_batch(batch))
+    
+    async def _run_batch(self, batch: List[tuple]):
+        """Moderate a batch and resolve each caller's future"""
+        self.batch_counters["batches"] += 1
+        self.batch_counters["items"] += len(batch)
+        
+        try:
+            verdicts = await self.moderator.check_batch([content for content, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), verdict in zip(batch, verdicts):
+            # Callers that were cancelled while waiting are simply skipped
+            if not future.done():
+                future.set_result(verdict)
+    
+    def batch_stats(self) -> Dict[str, Any]:
+        """Batch counters and average batch size"""
+        batches = self.batch_counters["batches"]
+        return {
+            **self.batch_counters,
+            "avg_batch_size": round(self.batch_counters["items"] / batches, 2) if batches else 0.0,
+            "pending": len(self.pending)
+        }
 
 
 class PromptEnhancer:
@@ -211,11 +455,9 @@ class PromptEnhancer:
             "minimalist": "minimalist design, simple composition, clean lines, negative space"
         }
     
-    async def enhance_prompt(self, original_prompt: str, style: str = "photorealistic") -> str:
-        """Enhance a prompt with style-specific improvements"""
-        style_addon = self.style_templates.get(style, "")
-        
-        enhancement_prompt = f"""Improve this image generation prompt by adding specific visual details:
+    def _build_enhancement_prompt(self, original_prompt: str, style: str) -> str:
+        """Build the LLM instruction used to enhance a prompt"""
+        return f"""Improve this image generation prompt by adding specific visual details:
         Original: "{original_prompt}"
         Style: {style}
         
@@ -226,6 +468,12 @@ class PromptEnhancer:
         - Colors and mood
         
         Keep it under 150 words. Return only the enhanced prompt."""
+    
+    async def enhance_prompt(self, original_prompt: str, style: str = "photorealistic") -> str:
+        """Enhance a prompt with style-specific improvements"""
+        style_addon = self.style_templates.get(style, "")
+        
+        enhancement_prompt = self._build_enhancement_prompt(original_prompt, style)
         
         response = await self.ollama.generate(enhancement_prompt)
         
@@ -237,4 +485,35 @@ class PromptEnhancer:
             return enhanced
         
         # Fallback: add style template to original
-        return f"{original_prompt}, {style_addon}" if style_addon else original_prompt
\ No newline at end of file
+        return f"{original_prompt}, {style_addon}" if style_addon else original_prompt
+    
+    async def enhance_prompt_stream(self, original_prompt: str, style: str = "photorealistic") -> AsyncIterator[str]:
+        """Stream enhanced prompt tokens as they are generated
+        
+        Applies the same style-template and fallback rules as ``enhance_prompt``;
+        the style addon is emitted as a trailing token once the model is done.
+        """
+        style_addon = self.style_templates.get(style, "")
+        enhancement_prompt = self._build_enhancement_prompt(original_prompt, style)
+        
+        parts: List[str] = []
+        leading = True
+        async for chunk in self.ollama.generate_stream(enhancement_prompt):
+            if "error" in chunk:
+                break
+            token = chunk.get("response", "")
+            # enhance_prompt strips the full text, so drop leading whitespace here too
+            if leading:
+                token = token.lstrip()
+                leading = not token
+            if token:
+                parts.append(token)
+                yield token
+        
+        if not parts:
+            # Fallback: add style template to original
+            yield f"{original_prompt}, {style_addon}" if style_addon else original_prompt
+            return
+        
+        if style_addon and style_addon not in "".join(parts).strip().lower():
+            yield f", {style_addon}"
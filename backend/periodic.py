@@ -0,0 +1,52 @@
+"""
+Periodic Module
+Base class for services that repeat some work in the background
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask(ABC):
+    """Runs ``tick`` now and then every ``interval`` seconds until stopped
+
+    Subclasses implement ``tick``. An exception from it is logged and the
+    next tick still runs on schedule, so one failed pass never stops the
+    loop.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.task: Optional[asyncio.Task] = None
+
+    @abstractmethod
+    async def tick(self):
+        """One pass of the periodic work"""
+        pass
+
+    async def _run(self):
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.warning(f"{type(self).__name__} failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start running in the background"""
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task"""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self.task = None
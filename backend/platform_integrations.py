@@ -4,21 +4,107 @@ Handles connections to various content distribution platforms
 """
 
 import asyncio
+import mimetypes
+import time
+import aiofiles
 import httpx
-from typing import Dict, Any, List, Optional
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Union, AsyncIterator, Tuple
 from datetime import datetime
 import hashlib
 import hmac
 import base64
 from abc import ABC, abstractmethod
 
+from oe_config import (
+    OE_PLATFORM_TIMEOUT, OE_PLATFORM_DEADLINE, OE_UPLOAD_CHUNK_SIZE, OE_UPLOAD_CHUNK_RETRIES
+)
+from rate_limiter import RateLimitedTransport, get_rate_limiter, rate_limit_stats, RETRYABLE_STATUSES
+from http_clients import http_clients
+from metrics import PLATFORM_SECONDS, TIMEOUTS, RETRIES
+
+async def _file_chunks(path: Path, chunk_size: int) -> AsyncIterator[bytes]:
+    """Read a file in fixed-size chunks"""
+    async with aiofiles.open(path, "rb") as f:
+        while True:
+            chunk = await f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+            # Drop the sent chunk before reading the next one
+            del chunk
+
+
+async def _rechunk(source: AsyncIterator[bytes], chunk_size: int) -> AsyncIterator[bytes]:
+    """Regroup an arbitrary byte stream into fixed-size chunks"""
+    buffer = bytearray()
+    async for data in source:
+        buffer.extend(data)
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+class _ChunkBody:
+    """Re-iterable request body that can drop its buffer once sent
+    
+    httpx request objects end up in reference cycles, so a plain bytes body
+    stays alive until the cycle collector runs. Releasing the buffer
+    explicitly stops sent chunks from piling up.
+    """
+    
+    def __init__(self, data: bytes):
+        self.data = data
+    
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        yield self.data
+    
+    def release(self):
+        self.data = b""
+
+
+async def _no_lookahead(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[bytes, None]]:
+    """Pass chunks through for an upload whose size is already known"""
+    async for chunk in chunks:
+        yield chunk, None
+        del chunk
+
+
+async def _with_last(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[bytes, bool]]:
+    """Pair each chunk with whether it is the final one"""
+    previous = None
+    async for chunk in chunks:
+        if previous is not None:
+            yield previous, False
+        previous = chunk
+    if previous is not None:
+        yield previous, True
+
+
 class PlatformIntegration(ABC):
     """Base class for platform integrations"""
     
+    # Key into OE_PLATFORM_RATE_LIMITS; accounts on the same platform share limits
+    platform_name = "default"
+    base_url = ""
+    # Resumable upload sessions live under this path
+    upload_session_path = "/uploads"
+    
     def __init__(self, api_key: str, api_secret: str = None):
         self.api_key = api_key
         self.api_secret = api_secret
-        self.client = httpx.AsyncClient(timeout=30.0)
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled, rate-limited client shared by every account on this platform"""
+        limiter = get_rate_limiter(self.platform_name)
+        return http_clients.client(
+            self.base_url,
+            timeout=30.0,
+            wrap=lambda transport: RateLimitedTransport(limiter, transport)
+        )
     
     @abstractmethod
     async def authenticate(self) -> bool:
@@ -40,17 +126,149 @@ class PlatformIntegration(ABC):
         """Get analytics for specific content"""
         pass
     
+    async def upload_headers(self) -> Dict[str, str]:
+        """Auth headers for resumable upload requests"""
+        return {}
+    
+    async def upload_stream(
+        self,
+        source: Union[str, Path, AsyncIterator[bytes]],
+        metadata: Dict[str, Any],
+        filename: Optional[str] = None,
+        size: Optional[int] = None,
+        chunk_size: int = OE_UPLOAD_CHUNK_SIZE
+    ) -> Dict[str, Any]:
+        """Upload a file or byte stream through a resumable upload session
+        
+        Memory use is bounded by a few chunks, not the file size. A file is
+        read one chunk at a time. A stream is regrouped into chunks through
+        a buffer, and when its length is unknown the next chunk is held too
+        so the final one can be marked with the total. Resuming a partly
+        written chunk copies its unsent tail. A failed chunk is retried from the
+        offset the platform reports, so a dropped connection does not
+        restart the upload from zero.
+        """
+        if isinstance(source, (str, Path)):
+            path = Path(source)
+            filename = filename or path.name
+            size = path.stat().st_size if size is None else size
+            chunks = _file_chunks(path, chunk_size)
+        else:
+            chunks = _rechunk(source, chunk_size)
+        # Only a stream of unknown length needs lookahead to spot its last chunk
+        sized_chunks = _no_lookahead(chunks) if size is not None else _with_last(chunks)
+        
+        headers = await self.upload_headers()
+        try:
+            response = await self.client.post(
+                f"{self.base_url}{self.upload_session_path}",
+                headers=headers,
+                json={
+                    "filename": filename,
+                    "size": size,
+                    "contentType": mimetypes.guess_type(filename or "")[0] or "application/octet-stream"
+                }
+            )
+            response.raise_for_status()
+            session = response.json()
+            upload_id = session.get("uploadId") or session["id"]
+            upload_url = f"{self.base_url}{self.upload_session_path}/{upload_id}"
+            
+            offset = 0
+            async for chunk, last in sized_chunks:
+                total = size if size is not None else (offset + len(chunk) if last else None)
+                offset = await self._send_chunk(upload_url, headers, chunk, offset, total)
+                del chunk
+            
+            response = await self.client.post(f"{upload_url}/complete", headers=headers, json=metadata)
+            response.raise_for_status()
+            data = response.json()
+            return {
+                "success": True,
+                "post_id": data.get("id") or data.get("postId") or data.get("contentId"),
+                "upload_id": upload_id,
+                "bytes_sent": offset
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    async def _send_chunk(
+        self,
+        upload_url: str,
+        headers: Dict[str, str],
+        chunk: bytes,
+        start: int,
+        total: Optional[int]
+    ) -> int:
+        """PUT one chunk, resuming from the platform's offset on failure
+        
+        This is the only retry layer for chunk PUTs: the rate limiter is
+        told not to retry them, since resending the whole chunk would
+        ignore what the platform already kept. Chunks draw from their own
+        ``chunk`` bucket; the ``upload`` bucket only paces new sessions.
+        """
+        end = start + len(chunk) - 1
+        committed = 0
+        attempt = 0
+        limiter = get_rate_limiter(self.platform_name)
+        
+        while True:
+            body = _ChunkBody(chunk[committed:] if committed else chunk)
+            try:
+                response = await self.client.put(
+                    upload_url,
+                    headers={
+                        **headers,
+                        "Content-Length": str(len(body.data)),
+                        "Content-Range": f"bytes {start + committed}-{end}/{'*' if total is None else total}"
+                    },
+                    content=body,
+                    extensions={"max_retries": 0, "endpoint": "chunk"}
+                )
+                response.raise_for_status()
+                return end + 1
+            except (httpx.HTTPStatusError, httpx.TransportError) as e:
+                if isinstance(e, httpx.HTTPStatusError) and e.response.status_code not in RETRYABLE_STATUSES:
+                    raise
+                attempt += 1
+                if attempt > OE_UPLOAD_CHUNK_RETRIES:
+                    raise
+                RETRIES.inc(f"platform_{self.platform_name}", "chunk_resume")
+                # A Retry-After has already paused the bucket the next request waits on
+                await asyncio.sleep(limiter.backoff(attempt))
+                
+                # Ask the platform how much it actually kept
+                try:
+                    response = await self.client.get(upload_url, headers=headers)
+                    response.raise_for_status()
+                    offset = int(response.json().get("offset", start + committed))
+                except (httpx.HTTPError, ValueError):
+                    continue
+                if offset < start:
+                    raise RuntimeError(f"Upload session lost data before byte {start}") from e
+                committed = min(offset - start, len(chunk))
+                if committed == len(chunk):
+                    return end + 1
+            finally:
+                body.release()
+    
     async def close(self):
-        """Close the HTTP client"""
-        await self.client.aclose()
+        """Release per-account state; connections belong to the shared registry"""
+        pass
 
 
 class OnlyFansIntegration(PlatformIntegration):
     """OnlyFans platform integration"""
     
+    platform_name = "onlyfans"
+    base_url = "https://onlyfans.com/api2/v2"
+    upload_session_path = "/uploads"
+    
     def __init__(self, api_key: str, api_secret: str = None):
         super().__init__(api_key, api_secret)
-        self.base_url = "https://onlyfans.com/api2/v2"
         self.user_id = None
         self.session_token = None
     
@@ -120,6 +338,12 @@ class OnlyFansIntegration(PlatformIntegration):
                 "error": str(e)
             }
     
+    async def upload_headers(self) -> Dict[str, str]:
+        """Session auth for resumable uploads"""
+        if not self.session_token:
+            await self.authenticate()
+        return {"Authorization": f"Bearer {self.session_token}"}
+    
     async def schedule_post(self, content_id: str, scheduled_time: datetime, caption: str = "") -> Dict[str, Any]:
         """Schedule a post on OnlyFans"""
         if not self.session_token:
@@ -205,9 +429,9 @@ class OnlyFansIntegration(PlatformIntegration):
 class FanslyIntegration(PlatformIntegration):
     """Fansly platform integration"""
     
-    def __init__(self, api_key: str, api_secret: str = None):
-        super().__init__(api_key, api_secret)
-        self.base_url = "https://apiv3.fansly.com/api/v1"
+    platform_name = "fansly"
+    base_url = "https://apiv3.fansly.com/api/v1"
+    upload_session_path = "/media/uploads"
     
     async def authenticate(self) -> bool:
         """Authenticate with Fansly API"""
@@ -261,6 +485,10 @@ class FanslyIntegration(PlatformIntegration):
                 "error": str(e)
             }
     
+    async def upload_headers(self) -> Dict[str, str]:
+        """API key auth for resumable uploads"""
+        return {"Authorization": self.api_key}
+    
     async def schedule_post(self, content_id: str, scheduled_time: datetime, caption: str = "") -> Dict[str, Any]:
         """Schedule a post on Fansly"""
         headers = {
@@ -314,9 +542,9 @@ class FanslyIntegration(PlatformIntegration):
 class FeetFinderIntegration(PlatformIntegration):
     """FeetFinder platform integration"""
     
-    def __init__(self, api_key: str, api_secret: str = None):
-        super().__init__(api_key, api_secret)
-        self.base_url = "https://api.feetfinder.com/v1"
+    platform_name = "feetfinder"
+    base_url = "https://api.feetfinder.com/v1"
+    upload_session_path = "/content/uploads"
     
     async def authenticate(self) -> bool:
         """Authenticate with FeetFinder API"""
@@ -383,6 +611,10 @@ class FeetFinderIntegration(PlatformIntegration):
                 "error": str(e)
             }
     
+    async def upload_headers(self) -> Dict[str, str]:
+        """API key auth for resumable uploads"""
+        return {"X-API-Key": self.api_key}
+    
     async def schedule_post(self, content_id: str, scheduled_time: datetime, caption: str = "") -> Dict[str, Any]:
         """Schedule a post on FeetFinder"""
         headers = {
@@ -434,65 +666,143 @@ class FeetFinderIntegration(PlatformIntegration):
 
 
 class PlatformManager:
-    """Manages multiple platform integrations"""
+    """Manages multiple platform integrations
     
-    def __init__(self):
+    Fan-out calls hit every platform concurrently. Each platform gets its own
+    timeout and the whole fan-out is bounded by an overall deadline; platforms
+    that fail or run out of time are reported individually while the others
+    still return their results.
+    """
+    
+    def __init__(self, platform_timeout: float = OE_PLATFORM_TIMEOUT, deadline: float = OE_PLATFORM_DEADLINE):
         self.platforms: Dict[str, PlatformIntegration] = {}
+        self.platform_timeout = platform_timeout
+        self.deadline = deadline
     
     def add_platform(self, name: str, integration: PlatformIntegration):
         """Add a platform integration"""
         self.platforms[name] = integration
     
-    async def upload_to_all(self, content_data: bytes, metadata: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
-        """Upload content to all configured platforms"""
-        results = {}
-        
-        for platform_name, platform in self.platforms.items():
+    async def _fan_out(
+        self,
+        operation: str,
+        calls: Dict[str, Callable[[PlatformIntegration], Awaitable[Optional[Dict[str, Any]]]]],
+        deadline: Optional[float] = ...,
+        timeout: Optional[float] = ...,
+        timings: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Run one call per platform concurrently and collect partial results
+        
+        ``deadline`` and ``timeout`` default to the manager's settings; pass
+        None to disable either. If ``timings`` is given, each platform's
+        wall time in milliseconds is recorded there, leaving the platform
+        payloads untouched.
+        """
+        deadline = self.deadline if deadline is ... else deadline
+        timeout = self.platform_timeout if timeout is ... else timeout
+        timings = {} if timings is None else timings
+        started = time.monotonic()
+        
+        def elapsed_ms() -> float:
+            return round((time.monotonic() - started) * 1000, 1)
+        
+        async def call_platform(name: str, call) -> Dict[str, Any]:
             try:
-                result = await platform.upload_content(content_data, metadata)
-                results[platform_name] = result
+                result = await asyncio.wait_for(call(self.platforms[name]), timeout)
+            except asyncio.TimeoutError:
+                TIMEOUTS.inc(f"platform_{operation}")
+                result = {"success": False, "error": f"Timed out after {timeout}s", "timed_out": True}
             except Exception as e:
-                results[platform_name] = {
-                    "success": False,
-                    "error": str(e)
-                }
+                result = {"success": False, "error": str(e)}
+            PLATFORM_SECONDS.observe(time.monotonic() - started, name, operation)
+            timings[name] = elapsed_ms()
+            if result is None:
+                result = {"success": False, "error": "No response from platform"}
+            return result
+        
+        tasks = {
+            name: asyncio.create_task(call_platform(name, call))
+            for name, call in calls.items()
+            if name in self.platforms
+        }
+        if not tasks:
+            return {}
+        
+        _, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            TIMEOUTS.inc(f"platform_{operation}_deadline", amount=len(pending))
         
+        results = {}
+        for name, task in tasks.items():
+            if task in pending:
+                timings[name] = elapsed_ms()
+                results[name] = {"success": False, "error": f"Deadline of {deadline}s exceeded", "timed_out": True}
+            else:
+                results[name] = task.result()
         return results
     
+    async def upload_to_all(
+        self,
+        content_data: bytes,
+        metadata: Dict[str, Any],
+        platforms: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Upload content to all configured platforms (or the given subset)"""
+        return await self._fan_out("upload_content", {
+            platform_name: lambda platform: platform.upload_content(content_data, metadata)
+            for platform_name in (self.platforms if platforms is None else platforms)
+        })
+    
+    async def upload_file_to_all(
+        self,
+        path: Path,
+        metadata: Dict[str, Any],
+        platforms: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Stream a file from disk to every platform (or the given subset)
+        
+        Large files take longer than a normal API call, so per-platform
+        timeouts and the overall deadline do not apply here.
+        """
+        return await self._fan_out("upload_stream", {
+            platform_name: lambda platform: platform.upload_stream(path, metadata)
+            for platform_name in (self.platforms if platforms is None else platforms)
+        }, deadline=None, timeout=None)
+    
     async def schedule_to_platforms(
         self, 
         platforms: List[str], 
-        content_id: str, 
+        content_id: Union[str, Dict[str, str]], 
         scheduled_time: datetime, 
         caption: str = ""
     ) -> Dict[str, Dict[str, Any]]:
-        """Schedule content to specific platforms"""
-        results = {}
-        
-        for platform_name in platforms:
-            if platform_name in self.platforms:
-                platform = self.platforms[platform_name]
-                try:
-                    result = await platform.schedule_post(content_id, scheduled_time, caption)
-                    results[platform_name] = result
-                except Exception as e:
-                    results[platform_name] = {
-                        "success": False,
-                        "error": str(e)
-                    }
-        
-        return results
+        """Schedule content to specific platforms
+        
+        ``content_id`` may be a mapping of platform name to that platform's
+        own post id.
+        """
+        def schedule(platform_name: str):
+            platform_content_id = content_id.get(platform_name) if isinstance(content_id, dict) else content_id
+            return lambda platform: platform.schedule_post(platform_content_id, scheduled_time, caption)
+        
+        return await self._fan_out("schedule_post", {
+            platform_name: schedule(platform_name)
+            for platform_name in platforms
+        })
     
     async def get_combined_analytics(self, content_id: str) -> Dict[str, Any]:
-        """Get combined analytics from all platforms"""
-        analytics = {}
+        """Get combined analytics from all platforms
         
-        for platform_name, platform in self.platforms.items():
-            try:
-                platform_analytics = await platform.get_analytics(content_id)
-                analytics[platform_name] = platform_analytics
-            except Exception as e:
-                analytics[platform_name] = {"error": str(e)}
+        ``timings`` holds each platform's response time in milliseconds,
+        kept apart from the analytics payloads.
+        """
+        timings: Dict[str, float] = {}
+        analytics = await self._fan_out("get_analytics", {
+            platform_name: lambda platform: platform.get_analytics(content_id)
+            for platform_name in self.platforms
+        }, timings=timings)
         
         # Calculate combined metrics
         total_views = sum(
@@ -510,10 +820,14 @@ class PlatformManager:
             "combined": {
                 "total_views": total_views,
                 "total_revenue": total_revenue
-            }
+            },
+            "timings": timings
         }
     
+    def rate_limit_stats(self) -> Dict[str, Any]:
+        """Throttling and retry counters per platform"""
+        return rate_limit_stats()
+    
     async def close_all(self):
         """Close all platform connections"""
-        for platform in self.platforms.values():
-            await platform.close()
\ No newline at end of file
+        await asyncio.gather(*(platform.close() for platform in self.platforms.values()))
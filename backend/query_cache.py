@@ -0,0 +1,80 @@
+"""
+Query Cache Module
+Short-lived read-through cache for database list queries
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Tuple, List, Callable, Awaitable, Set
+
+
+class QueryCache:
+    """In-process TTL cache with tag-based invalidation
+
+    Each entry is tagged (for example with the owning user id) so a write
+    can drop every cached page it affects. A load that overlaps an
+    invalidation of one of its tags is returned but not stored, so a page
+    read just before an insert cannot outlive it.
+    """
+
+    def __init__(self, ttl_seconds: float = 5.0, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[float, List[str], Any]]" = OrderedDict()
+        self.tags: Dict[str, Set[str]] = {}
+        self.versions: Dict[str, int] = {}
+        self.counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    async def get_or_load(self, key: str, tags: List[str], load: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for a key, loading it on a miss"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, _, value = entry
+            if expires_at > time.monotonic():
+                self.entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return value
+            self._drop(key)
+
+        self.counters["misses"] += 1
+        versions = [self.versions.get(tag, 0) for tag in tags]
+        value = await load()
+        if versions == [self.versions.get(tag, 0) for tag in tags]:
+            self._store(key, tags, value)
+        return value
+
+    def _store(self, key: str, tags: List[str], value: Any):
+        self._drop(key)
+        self.entries[key] = (time.monotonic() + self.ttl_seconds, tags, value)
+        for tag in tags:
+            self.tags.setdefault(tag, set()).add(key)
+        while len(self.entries) > self.max_entries:
+            self._drop(next(iter(self.entries)))
+
+    def _drop(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+
+    def invalidate(self, *tags: str):
+        """Drop every entry carrying any of the tags"""
+        for tag in tags:
+            self.versions[tag] = self.versions.get(tag, 0) + 1
+            for key in list(self.tags.get(tag, ())):
+                self._drop(key)
+        self.counters["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(self.entries)
+        }
@@ -0,0 +1,265 @@
+"""
+Rate Limiter Module
+Per-platform token buckets and retry handling for outbound platform calls
+"""
+
+import asyncio
+import random
+import time
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable
+
+import httpx
+
+from oe_config import OE_PLATFORM_RATE_LIMITS, OE_PLATFORM_MAX_RETRIES
+from metrics import metrics, RETRIES
+
+logger = logging.getLogger(__name__)
+
+# Responses that mean "slow down" and never reached the handler
+THROTTLE_STATUSES = {429, 503}
+# Gateway errors are only retried for requests that are safe to repeat
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class TokenBucket:
+    """Token bucket shared by every caller of one endpoint class
+
+    ``pause`` blocks the whole bucket, so a Retry-After from the platform
+    holds back every pending request of that class, not just the one that
+    was rejected.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> float:
+        """Take a token, returning how long the caller had to wait"""
+        waited = 0.0
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    delay = (1 - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for the given time"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+
+class PlatformRateLimiter:
+    """Rate limiting and retries for every request sent to one platform
+
+    Requests are classified into endpoint classes (``upload``, ``schedule``,
+    ``read``, ``write``), each with its own bucket; a caller can name the
+    class directly with ``extensions={"endpoint": ...}``. Throttled and
+    transient failures are retried with jittered exponential backoff,
+    honouring the platform's Retry-After when it sends one. Callers that
+    retry on their own pass ``extensions={"max_retries": 0}`` so attempts do
+    not multiply; such requests still go through the bucket, and a throttle
+    handed back to them is not counted as an error.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limits: Dict[str, Tuple[float, int]],
+        max_retries: int = OE_PLATFORM_MAX_RETRIES,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0
+    ):
+        self.name = name
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.buckets = {
+            endpoint: TokenBucket(rate, burst)
+            for endpoint, (rate, burst) in limits.items()
+        }
+        self.counters: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def classify(request: httpx.Request) -> str:
+        """Map a request onto an endpoint class"""
+        endpoint = request.extensions.get("endpoint")
+        if endpoint:
+            return endpoint
+        path = request.url.path.lower()
+        if "schedul" in path:
+            return "schedule"
+        if request.method == "GET":
+            return "read"
+        if "upload" in path or "multipart/form-data" in request.headers.get("content-type", ""):
+            return "upload"
+        return "write"
+
+    def _bucket(self, endpoint: str) -> Optional[TokenBucket]:
+        return self.buckets.get(endpoint) or self.buckets.get("default")
+
+    def _count(self, endpoint: str, name: str, amount: float = 1):
+        counters = self.counters.setdefault(endpoint, {
+            "requests": 0, "retries": 0, "throttled_responses": 0, "errors": 0, "throttled_seconds": 0.0
+        })
+        counters[name] += amount
+
+    @staticmethod
+    def retry_after(response: httpx.Response) -> Optional[float]:
+        """Parse a Retry-After header given in seconds or as an HTTP date"""
+        value = response.headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def send(
+        self,
+        request: httpx.Request,
+        send: Callable[[httpx.Request], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        """Send a request through the endpoint's bucket, retrying when throttled"""
+        endpoint = self.classify(request)
+        bucket = self._bucket(endpoint)
+        idempotent = request.method in IDEMPOTENT_METHODS
+        max_retries = request.extensions.get("max_retries", self.max_retries)
+        attempt = 0
+
+        while True:
+            if bucket:
+                waited = await bucket.acquire()
+                if waited:
+                    self._count(endpoint, "throttled_seconds", waited)
+            self._count(endpoint, "requests")
+
+            try:
+                response = await send(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                # The request never left, so it is safe to resend
+                error = e
+                response = None
+            except httpx.TransportError as e:
+                if not idempotent:
+                    self._count(endpoint, "errors")
+                    raise
+                error = e
+                response = None
+
+            if response is not None:
+                retryable = response.status_code in THROTTLE_STATUSES or (
+                    idempotent and response.status_code in RETRYABLE_STATUSES
+                )
+                if not retryable:
+                    return response
+                if response.status_code in THROTTLE_STATUSES:
+                    self._count(endpoint, "throttled_responses")
+
+            if attempt >= max_retries:
+                # A caller that retries on its own expects throttles; only give-ups are errors
+                if not (max_retries == 0 and response is not None and response.status_code in THROTTLE_STATUSES):
+                    self._count(endpoint, "errors")
+                if response is None:
+                    raise error
+                # The caller may retry; make sure its next attempt waits too
+                retry_after = self.retry_after(response)
+                if retry_after is not None and bucket:
+                    bucket.pause(min(retry_after, self.max_delay))
+                return response
+
+            delay = self.backoff(attempt)
+            if response is not None:
+                retry_after = self.retry_after(response)
+                if retry_after is not None:
+                    delay = min(retry_after, self.max_delay) + random.uniform(0, self.base_delay)
+                    if bucket:
+                        bucket.pause(delay)
+                await response.aclose()
+                logger.warning(
+                    f"{self.name} {endpoint} returned {response.status_code}, retrying in {delay:.2f}s"
+                )
+            else:
+                logger.warning(f"{self.name} {endpoint} failed ({error}), retrying in {delay:.2f}s")
+
+            attempt += 1
+            self._count(endpoint, "retries")
+            RETRIES.inc(f"platform_{self.name}", str(response.status_code) if response is not None else "transport_error")
+            self._count(endpoint, "throttled_seconds", delay)
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-endpoint request, retry and throttling counters"""
+        return {
+            endpoint: {**counters, "throttled_seconds": round(counters["throttled_seconds"], 3)}
+            for endpoint, counters in self.counters.items()
+        }
+
+
+metrics.gauge(
+    "oe_platform_throttled_seconds", "Total time spent waiting on platform rate limits",
+    ("platform", "endpoint"),
+    collect=lambda: {
+        (name, endpoint): counters["throttled_seconds"]
+        for name, limiter in _limiters.items()
+        for endpoint, counters in limiter.counters.items()
+    }
+)
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """httpx transport that routes every request through a platform limiter"""
+
+    def __init__(self, limiter: PlatformRateLimiter, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.limiter = limiter
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self.limiter.send(request, self.transport.handle_async_request)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+# One limiter per platform, shared by every account's integration instance
+_limiters: Dict[str, PlatformRateLimiter] = {}
+
+
+def get_rate_limiter(platform: str) -> PlatformRateLimiter:
+    """Get the process-wide limiter for a platform"""
+    if platform not in _limiters:
+        limits = OE_PLATFORM_RATE_LIMITS.get(platform, OE_PLATFORM_RATE_LIMITS["default"])
+        _limiters[platform] = PlatformRateLimiter(platform, limits)
+    return _limiters[platform]
+
+
+def rate_limit_stats() -> Dict[str, Any]:
+    """Counters for every platform limiter created so far"""
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
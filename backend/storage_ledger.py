@@ -0,0 +1,101 @@
+"""
+Storage Ledger Module
+Running totals of bytes and files under the storage root
+"""
+
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+class StorageLedger(PeriodicTask):
+    """Incrementally maintained storage usage
+
+    Writers call ``record_write``/``record_delete`` as they add and remove
+    files, so reading usage is O(1). A background ``scandir`` walk in a
+    worker thread periodically replaces the totals with the true figures,
+    correcting drift from files changed outside the app. Changes recorded
+    while a walk is running are added on top of its result, since the
+    walk may already have passed the directory they touched.
+    """
+
+    def __init__(self, root: Path, reconcile_interval: float = 3600.0):
+        super().__init__(reconcile_interval)
+        self.root = root
+        self.bytes = 0
+        self.files = 0
+        self.reconciled_at: Optional[float] = None
+        self.reconcile_seconds: Optional[float] = None
+        # Bytes and files recorded since the running walk started
+        self.scan_delta: Optional[List[int]] = None
+
+    def _apply(self, size: int, files: int):
+        self.bytes = max(0, self.bytes + size)
+        self.files = max(0, self.files + files)
+        if self.scan_delta is not None:
+            self.scan_delta[0] += size
+            self.scan_delta[1] += files
+
+    def record_write(self, size: int):
+        """Account for a newly written file"""
+        self._apply(size, 1)
+
+    def record_delete(self, size: int):
+        """Account for a removed file"""
+        self._apply(-size, -1)
+
+    def _scan(self) -> Tuple[int, int]:
+        """Walk the tree with scandir, summing file sizes"""
+        total_bytes = 0
+        total_files = 0
+        stack = [str(self.root)]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                total_bytes += entry.stat(follow_symlinks=False).st_size
+                                total_files += 1
+                        except FileNotFoundError:
+                            # Removed mid-walk
+                            continue
+            except (FileNotFoundError, PermissionError):
+                continue
+        return total_bytes, total_files
+
+    async def reconcile(self):
+        """Recompute the totals from disk without blocking the event loop"""
+        started = time.monotonic()
+        self.scan_delta = [0, 0]
+        try:
+            total_bytes, total_files = await asyncio.to_thread(self._scan)
+            delta_bytes, delta_files = self.scan_delta
+        finally:
+            self.scan_delta = None
+        self.bytes = max(0, total_bytes + delta_bytes)
+        self.files = max(0, total_files + delta_files)
+        self.reconciled_at = time.time()
+        self.reconcile_seconds = round(time.monotonic() - started, 3)
+
+    async def tick(self):
+        await self.reconcile()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current totals and when they were last reconciled"""
+        return {
+            "bytes": self.bytes,
+            "files": self.files,
+            "reconciled_at": self.reconciled_at,
+            "reconcile_seconds": self.reconcile_seconds
+        }
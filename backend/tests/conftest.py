@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Backend modules are imported flat, as uvicorn does from backend/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("OE_STORAGE_PATH", tempfile.mkdtemp(prefix="oe-tests-"))
@@ -0,0 +1,154 @@
+"""
+Completion detection against a local fake ComfyUI
+
+The fake serves ``/prompt``, ``/history/{prompt_id}`` and the ``/ws`` event
+stream over a real socket, so the client's websocket listener and its
+``/history`` fallback are both exercised end to end.
+"""
+
+import asyncio
+import socket
+import time
+import uuid
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+import comfyui_integration
+from comfyui_integration import ComfyUIClient, WorkflowManager
+from http_clients import http_clients
+
+POLL_SECONDS = 5.0
+RENDER_SECONDS = 0.2
+WORKFLOW = {"3": {"class_type": "KSampler", "inputs": {"seed": 1, "steps": 20}}}
+
+
+class FakeComfyUI:
+    """Finishes every prompt after ``RENDER_SECONDS``, announcing it over /ws"""
+
+    def __init__(self):
+        self.sockets = {}
+        self.history = {}
+        self.history_requests = 0
+        self.accept_websockets = True
+        self.app = Starlette(routes=[
+            Route("/prompt", self.prompt, methods=["POST"]),
+            Route("/history/{prompt_id}", self.get_history),
+            WebSocketRoute("/ws", self.websocket)
+        ])
+
+    async def prompt(self, request: Request) -> JSONResponse:
+        body = await request.json()
+        prompt_id = str(uuid.uuid4())
+        asyncio.create_task(self.render(prompt_id, body["client_id"]))
+        return JSONResponse({"prompt_id": prompt_id, "number": 0})
+
+    async def render(self, prompt_id: str, client_id: str):
+        await self.send(client_id, {"type": "execution_start", "data": {"prompt_id": prompt_id}})
+        await asyncio.sleep(RENDER_SECONDS)
+        self.history[prompt_id] = {
+            "outputs": {"9": {"images": [{"filename": f"{prompt_id}.png", "subfolder": "", "type": "output"}]}},
+            "status": {"status_str": "success", "completed": True}
+        }
+        await self.send(client_id, {"type": "executing", "data": {"node": None, "prompt_id": prompt_id}})
+
+    async def send(self, client_id: str, event: dict):
+        ws = self.sockets.get(client_id)
+        if ws is not None:
+            await ws.send_json(event)
+
+    async def get_history(self, request: Request) -> JSONResponse:
+        self.history_requests += 1
+        prompt_id = request.path_params["prompt_id"]
+        entry = self.history.get(prompt_id)
+        return JSONResponse({prompt_id: entry} if entry else {})
+
+    async def websocket(self, ws: WebSocket):
+        if not self.accept_websockets:
+            await ws.close()
+            return
+        client_id = ws.query_params["clientId"]
+        await ws.accept()
+        self.sockets[client_id] = ws
+        try:
+            while True:
+                await ws.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self.sockets.pop(client_id, None)
+
+    async def drop_websockets(self):
+        """Close every event stream and refuse reconnects"""
+        self.accept_websockets = False
+        for ws in list(self.sockets.values()):
+            await ws.close()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def with_fake_comfyui(tmp_path, scenario):
+    fake = FakeComfyUI()
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(fake.app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    client = ComfyUIClient(f"http://127.0.0.1:{port}", WorkflowManager(tmp_path / "workflows"))
+    client.listener.start()
+    await asyncio.wait_for(client.listener.connected.wait(), 5)
+    try:
+        return await scenario(fake, client)
+    finally:
+        await client.close()
+        await http_clients.close()
+        server.should_exit = True
+        await serving
+
+
+def test_completion_event_beats_poll_interval(tmp_path, monkeypatch):
+    monkeypatch.setattr(comfyui_integration, "OE_COMFYUI_HISTORY_POLL_SECONDS", POLL_SECONDS)
+
+    async def scenario(fake, client):
+        prompt_id = await client.queue_prompt(WORKFLOW)
+        started = time.monotonic()
+        status = await client.wait_for_completion(prompt_id, timeout=30)
+        return status, time.monotonic() - started, fake.history_requests
+
+    status, elapsed, history_requests = asyncio.run(with_fake_comfyui(tmp_path, scenario))
+
+    assert status["status"] == "completed"
+    assert status["filename"].endswith(".png")
+    assert elapsed < 1.0 < POLL_SECONDS
+    # Outputs are read once, after the event; nothing was polled before it
+    assert history_requests == 1
+
+
+def test_history_fallback_after_websocket_drops(tmp_path, monkeypatch):
+    monkeypatch.setattr(comfyui_integration, "OE_COMFYUI_HISTORY_POLL_SECONDS", POLL_SECONDS)
+
+    async def scenario(fake, client):
+        await fake.drop_websockets()
+        while client.listener.connected.is_set():
+            await asyncio.sleep(0.01)
+
+        prompt_id = await client.queue_prompt(WORKFLOW)
+        started = time.monotonic()
+        status = await client.wait_for_completion(prompt_id, timeout=30)
+        return status, time.monotonic() - started, fake.history_requests
+
+    status, elapsed, history_requests = asyncio.run(with_fake_comfyui(tmp_path, scenario))
+
+    assert status["status"] == "completed"
+    # Polled once a second rather than waiting out the websocket slice
+    assert history_requests >= 2
+    assert elapsed < POLL_SECONDS
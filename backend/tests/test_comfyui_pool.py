@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+import httpx
+
+import comfyui_integration
+from comfyui_integration import ComfyUIClient, ComfyUIPool, WorkflowManager
+from http_clients import http_clients, origin_of
+
+STALLED = "http://stalled.comfy:8188"
+HEALTHY = "http://healthy.comfy:8188"
+
+
+def fake_worker(prompt_id: str, completes: bool, calls: list):
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content) if request.content else None
+        calls.append((request.method, request.url.path, body))
+        if request.url.path == "/prompt":
+            return httpx.Response(200, json={"prompt_id": prompt_id})
+        if request.url.path.startswith("/history/"):
+            if not completes:
+                return httpx.Response(200, json={})
+            images = [{"filename": "out.png", "subfolder": "", "type": "output"}]
+            return httpx.Response(200, json={prompt_id: {"outputs": {"9": {"images": images}}}})
+        if request.url.path == "/view":
+            return httpx.Response(200, content=b"png")
+        if request.url.path == "/queue" and request.method == "GET":
+            return httpx.Response(200, json={"queue_running": [[0, prompt_id, {}, {}, []]], "queue_pending": []})
+        return httpx.Response(200, json={})
+
+    return handler
+
+
+def test_timed_out_prompt_is_cancelled_before_requeue(tmp_path, monkeypatch):
+    monkeypatch.setattr(comfyui_integration, "OE_COMFYUI_TIMEOUT_BASE_SECONDS", 0.3)
+    monkeypatch.setattr(comfyui_integration, "OE_COMFYUI_TIMEOUT_PER_STEP_SECONDS", 0.0)
+    stalled_calls, healthy_calls = [], []
+
+    async def scenario():
+        http_clients.clients[origin_of(STALLED)] = httpx.AsyncClient(
+            transport=httpx.MockTransport(fake_worker("stuck", False, stalled_calls))
+        )
+        http_clients.clients[origin_of(HEALTHY)] = httpx.AsyncClient(
+            transport=httpx.MockTransport(fake_worker("done", True, healthy_calls))
+        )
+        pool = ComfyUIPool([STALLED, HEALTHY], workflow_manager=WorkflowManager(tmp_path / "workflows"))
+        try:
+            return await pool.generate_image("a lighthouse")
+        finally:
+            await pool.close()
+            await http_clients.close()
+
+    result = asyncio.run(scenario())
+
+    assert result["success"] and result["worker"] == HEALTHY
+    assert ("POST", "/queue", {"delete": ["stuck"]}) in stalled_calls
+    assert ("POST", "/interrupt", {"prompt_id": "stuck"}) in stalled_calls
+
+
+def test_completion_timeout_scales_with_steps_and_batch(monkeypatch):
+    monkeypatch.setattr(comfyui_integration, "OE_COMFYUI_TIMEOUT_BASE_SECONDS", 30.0)
+    monkeypatch.setattr(comfyui_integration, "OE_COMFYUI_TIMEOUT_PER_STEP_SECONDS", 1.0)
+
+    assert ComfyUIClient.completion_timeout("standard", 1) == 50.0
+    assert ComfyUIClient.completion_timeout("ultra", 4) == 230.0
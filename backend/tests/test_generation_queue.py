@@ -0,0 +1,38 @@
+import asyncio
+
+from generation_queue import GenerationQueue
+
+
+def test_cancelled_caller_frees_its_queue_slot():
+    async def scenario():
+        queue = GenerationQueue(capacity=2, concurrency=1)
+        release = asyncio.Event()
+        ran = []
+
+        async def render(name):
+            ran.append(name)
+            await release.wait()
+            return name
+
+        queue.start()
+        running = asyncio.create_task(queue.run("a", "u1", "free", lambda: render("a")))
+        waiting = asyncio.create_task(queue.run("b", "u2", "free", lambda: render("b")))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert set(queue.running) == {"a"} and set(queue.jobs) == {"b"}
+
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        stats = queue.stats()
+
+        release.set()
+        result = await running
+        await queue.stop()
+        return stats, result, ran, queue.tiers
+
+    stats, result, ran, tiers = asyncio.run(scenario())
+
+    assert stats["queued"] == 0 and stats["cancelled"] == 1
+    assert result == "a"
+    assert ran == ["a"]
+    assert not any(tiers.values())
@@ -0,0 +1,32 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from health import DependencyProber, health_router
+
+
+def test_health_router_reports_prober_state():
+    async def up():
+        return True
+
+    async def down():
+        raise ConnectionError("refused")
+
+    async def scenario():
+        prober = DependencyProber({"db": up, "gpu": down}, required=["db"])
+        app = FastAPI()
+        app.include_router(health_router(prober))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            before = await client.get("/readyz")
+            await prober.probe()
+            after = await client.get("/readyz")
+            return before, after, await client.get("/healthz"), await client.get("/metrics")
+
+    before, after, healthz, metrics = asyncio.run(scenario())
+
+    assert before.status_code == 503
+    assert after.status_code == 200
+    assert after.json()["dependencies"]["gpu"]["status"] == "down"
+    assert healthz.json() == {"status": "ok"}
+    assert metrics.status_code == 200
@@ -0,0 +1,50 @@
+import asyncio
+
+import httpx
+
+from oe_config import OE_PLATFORM_RATE_LIMITS
+from rate_limiter import PlatformRateLimiter, RateLimitedTransport
+
+
+def limited_client(limiter: PlatformRateLimiter, status: int = 200) -> httpx.AsyncClient:
+    transport = httpx.MockTransport(lambda request: httpx.Response(status))
+    return httpx.AsyncClient(transport=RateLimitedTransport(limiter, transport))
+
+
+def test_session_chunks_do_not_spend_upload_tokens():
+    limiter = PlatformRateLimiter("onlyfans", OE_PLATFORM_RATE_LIMITS["onlyfans"])
+
+    async def scenario():
+        async with limited_client(limiter) as client:
+            # More chunks than the upload burst of 2; at 0.2 req/s these would wait ~15s
+            for _ in range(5):
+                await client.put(
+                    "https://onlyfans.test/api2/v2/uploads/session-1",
+                    content=b"x",
+                    extensions={"max_retries": 0, "endpoint": "chunk"}
+                )
+
+    asyncio.run(asyncio.wait_for(scenario(), 5))
+
+    stats = limiter.stats()
+    assert stats["chunk"]["requests"] == 5
+    assert "upload" not in stats
+    assert limiter.buckets["upload"].tokens == 2
+
+
+def test_caller_handled_throttle_is_not_an_error():
+    limiter = PlatformRateLimiter("onlyfans", OE_PLATFORM_RATE_LIMITS["onlyfans"])
+
+    async def scenario():
+        async with limited_client(limiter, status=429) as client:
+            return await client.put(
+                "https://onlyfans.test/api2/v2/uploads/session-1",
+                content=b"x",
+                extensions={"max_retries": 0, "endpoint": "chunk"}
+            )
+
+    response = asyncio.run(scenario())
+
+    assert response.status_code == 429
+    assert limiter.stats()["chunk"]["throttled_responses"] == 1
+    assert limiter.stats()["chunk"]["errors"] == 0
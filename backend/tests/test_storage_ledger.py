@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+from artifact_store import ArtifactStore
+from storage_ledger import StorageLedger
+
+
+def test_writes_during_a_scan_survive_reconcile(tmp_path):
+    ledger = StorageLedger(tmp_path)
+
+    def slow_scan():
+        time.sleep(0.2)
+        return 100, 1
+
+    ledger._scan = slow_scan
+
+    async def scenario():
+        reconcile = asyncio.create_task(ledger.reconcile())
+        await asyncio.sleep(0.05)
+        ledger.record_write(50)
+        await reconcile
+
+    asyncio.run(scenario())
+
+    assert (ledger.bytes, ledger.files) == (150, 2)
+    assert ledger.scan_delta is None
+
+
+def test_artifact_release_is_recorded(tmp_path):
+    ledger = StorageLedger(tmp_path)
+    artifacts = ArtifactStore(tmp_path / "generated", ledger=ledger)
+
+    async def scenario():
+        first = await artifacts.put_bytes(b"image", ".png")
+        second = await artifacts.put_bytes(b"image", ".png")
+        counted = (ledger.bytes, ledger.files)
+        await artifacts.release(first)
+        await artifacts.release(second)
+        return counted
+
+    counted = asyncio.run(scenario())
+
+    # Identical bytes share one file, counted once and removed once
+    assert counted == (5, 1)
+    assert (ledger.bytes, ledger.files) == (0, 0)
@@ -0,0 +1,39 @@
+import asyncio
+
+from artifact_store import ArtifactStore
+from workflow_automation import Workflow, WorkflowEngine, WorkflowStatus, WorkflowStep, workflow_to_dict
+from workflow_store import SQLiteWorkflowStore
+
+
+def test_restart_keeps_shared_artifacts_until_last_workflow_is_deleted(tmp_path):
+    async def scenario():
+        store = SQLiteWorkflowStore(tmp_path / "workflows.db")
+        artifacts = ArtifactStore(tmp_path / "generated")
+        ids = []
+        for status in (WorkflowStatus.COMPLETED, WorkflowStatus.FAILED):
+            # Both workflows rendered the same bytes, so they share one file
+            handle = await artifacts.put_bytes(b"same image", ".png")
+            step = WorkflowStep(name="generate", status=WorkflowStatus.COMPLETED, result={"images": [handle]})
+            workflow = Workflow(steps=[step], status=status)
+            await store.save(workflow_to_dict(workflow))
+            ids.append(workflow.id)
+        path = artifacts.path(handle["artifact_id"])
+
+        # Simulated restart: fresh engine and refcounts over the same files
+        engine = WorkflowEngine(store=store, artifact_store=ArtifactStore(tmp_path / "generated"))
+        await engine.recover_workflows()
+        refs = dict(engine.artifacts.refs)
+
+        await engine.delete_workflow(ids[0])
+        kept = path.exists()
+        await engine.delete_workflow(ids[1])
+        remaining = await store.load_by_status([status.value for status in WorkflowStatus])
+        store.close()
+        return refs, kept, path.exists(), remaining
+
+    refs, kept, exists, remaining = asyncio.run(scenario())
+
+    assert list(refs.values()) == [2]
+    assert kept
+    assert not exists
+    assert remaining == []
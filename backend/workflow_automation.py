@@ -10,7 +10,11 @@ from enum import Enum
 import json
 import uuid
 from dataclasses import dataclass, field
+from pathlib import Path
 import logging
+from oe_config import OE_STORAGE_BASE, OE_UPLOAD_CHUNK_SIZE, OE_WORKFLOW_STEP_CONCURRENCY
+from artifact_store import ArtifactStore, find_handles, strip_binary
+from metrics import stage, RETRIES
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +52,8 @@ class WorkflowStep:
     completed_at: Optional[datetime] = None
     retry_count: int = 0
     max_retries: int = 3
+    # Names of steps that must complete first; None means "the previous step"
+    depends_on: Optional[List[str]] = None
 
 
 @dataclass
@@ -64,13 +70,102 @@ class Workflow:
     results: Dict[str, Any] = field(default_factory=dict)
 
 
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def workflow_to_dict(workflow: Workflow) -> Dict[str, Any]:
+    """Serialize a workflow and its step state for checkpointing"""
+    return {
+        "id": workflow.id,
+        "name": workflow.name,
+        "status": workflow.status.value,
+        "created_at": _isoformat(workflow.created_at),
+        "started_at": _isoformat(workflow.started_at),
+        "completed_at": _isoformat(workflow.completed_at),
+        "metadata": workflow.metadata,
+        "results": workflow.results,
+        "steps": [
+            {
+                "id": step.id,
+                "type": step.type.value,
+                "name": step.name,
+                "params": step.params,
+                "status": step.status.value,
+                "result": step.result,
+                "error": step.error,
+                "started_at": _isoformat(step.started_at),
+                "completed_at": _isoformat(step.completed_at),
+                "retry_count": step.retry_count,
+                "max_retries": step.max_retries,
+                "depends_on": step.depends_on
+            }
+            for step in workflow.steps
+        ]
+    }
+
+
+def workflow_from_dict(data: Dict[str, Any]) -> Workflow:
+    """Rebuild a workflow from a checkpoint
+    
+    Steps that were mid-flight when the checkpoint was taken are reset to
+    pending so they run again; completed steps keep their results.
+    """
+    steps = []
+    for step_data in data["steps"]:
+        status = WorkflowStatus(step_data["status"])
+        interrupted = status == WorkflowStatus.RUNNING
+        steps.append(WorkflowStep(
+            id=step_data["id"],
+            type=StepType(step_data["type"]),
+            name=step_data["name"],
+            params=step_data["params"],
+            status=WorkflowStatus.PENDING if interrupted else status,
+            result=step_data["result"],
+            error=step_data["error"],
+            started_at=None if interrupted else _parse_datetime(step_data["started_at"]),
+            completed_at=_parse_datetime(step_data["completed_at"]),
+            retry_count=step_data["retry_count"],
+            max_retries=step_data["max_retries"],
+            depends_on=step_data["depends_on"]
+        ))
+    
+    return Workflow(
+        id=data["id"],
+        name=data["name"],
+        steps=steps,
+        status=WorkflowStatus(data["status"]),
+        created_at=_parse_datetime(data["created_at"]),
+        started_at=_parse_datetime(data["started_at"]),
+        completed_at=_parse_datetime(data["completed_at"]),
+        metadata=data["metadata"],
+        results=data["results"]
+    )
+
+
 class WorkflowEngine:
     """Executes workflows with proper error handling and retries"""
     
-    def __init__(self, comfyui_client=None, qa_system=None, platform_manager=None):
+    def __init__(
+        self,
+        comfyui_client=None,
+        qa_system=None,
+        platform_manager=None,
+        max_concurrency: int = OE_WORKFLOW_STEP_CONCURRENCY,
+        store=None,
+        artifact_store: Optional[ArtifactStore] = None
+    ):
         self.comfyui_client = comfyui_client
         self.qa_system = qa_system
         self.platform_manager = platform_manager
+        # Optional durable store (e.g. SQLiteWorkflowStore) checkpointed after every step
+        self.store = store
+        # Generated images live here; step results only carry artifact handles
+        self.artifacts = artifact_store or ArtifactStore(OE_STORAGE_BASE / "generated")
         self.workflows: Dict[str, Workflow] = {}
         self.step_handlers: Dict[StepType, Callable] = {
             StepType.GENERATE: self._handle_generate,
@@ -82,9 +177,17 @@ class WorkflowEngine:
             StepType.NOTIFY: self._handle_notify
         }
         self.running_workflows = set()
+        # Global limit on steps executing at once, across all workflows
+        self.step_semaphore = asyncio.Semaphore(max_concurrency)
+        self.resume_tasks = set()
     
     async def create_workflow(self, name: str, steps: List[Dict[str, Any]]) -> Workflow:
-        """Create a new workflow from configuration"""
+        """Create a new workflow from configuration
+        
+        Each step may list ``depends_on`` step names, which must refer to
+        earlier steps. Without it a step depends on the one before it, so
+        plain step lists keep running in order.
+        """
         workflow = Workflow(name=name)
         
         for step_config in steps:
@@ -93,11 +196,63 @@ class WorkflowEngine:
                 name=step_config.get("name", step_config["type"]),
                 params=step_config.get("params", {})
             )
+            
+            known = [s.name for s in workflow.steps]
+            if step.name in known:
+                raise ValueError(f"Duplicate step name {step.name}")
+            
+            depends_on = step_config.get("depends_on")
+            if depends_on is None:
+                depends_on = known[-1:]
+            for dependency in depends_on:
+                if dependency not in known:
+                    raise ValueError(f"Step {step.name} depends on unknown or later step {dependency}")
+            step.depends_on = list(depends_on)
+            
             workflow.steps.append(step)
         
         self.workflows[workflow.id] = workflow
+        await self._checkpoint(workflow)
         return workflow
     
+    async def _checkpoint(self, workflow: Workflow):
+        """Persist the workflow's current state, if a store is configured"""
+        if not self.store:
+            return
+        try:
+            await self.store.save(workflow_to_dict(workflow))
+        except Exception as e:
+            logger.error(f"Failed to checkpoint workflow {workflow.id}: {e}")
+    
+    async def recover_workflows(self) -> List[str]:
+        """Reload persisted workflows and resume the ones that were running
+        
+        Intended to be called once at startup. Every stored workflow is
+        reloaded, finished ones included, so artifact refcounts are rebuilt
+        from all live references and ``delete_workflow`` can still release
+        them. Resumed workflows pick up from their last completed step
+        instead of starting over.
+        """
+        if not self.store:
+            return []
+        
+        resumed = []
+        for data in await self.store.load_by_status([status.value for status in WorkflowStatus]):
+            workflow = workflow_from_dict(data)
+            self.workflows[workflow.id] = workflow
+            for step in workflow.steps:
+                for handle in find_handles(step.result):
+                    self.artifacts.acquire(handle)
+            if workflow.status == WorkflowStatus.RUNNING:
+                task = asyncio.create_task(self.execute_workflow(workflow.id))
+                self.resume_tasks.add(task)
+                task.add_done_callback(self.resume_tasks.discard)
+                resumed.append(workflow.id)
+        
+        if resumed:
+            logger.info(f"Resuming {len(resumed)} interrupted workflows")
+        return resumed
+    
     async def execute_workflow(self, workflow_id: str) -> Dict[str, Any]:
         """Execute a workflow asynchronously"""
         if workflow_id not in self.workflows:
@@ -110,19 +265,12 @@ class WorkflowEngine:
         
         self.running_workflows.add(workflow.id)
         workflow.status = WorkflowStatus.RUNNING
-        workflow.started_at = datetime.utcnow()
+        # Resumed workflows keep their original start time
+        workflow.started_at = workflow.started_at or datetime.utcnow()
+        await self._checkpoint(workflow)
         
         try:
-            # Execute steps sequentially
-            for step in workflow.steps:
-                if workflow.status == WorkflowStatus.CANCELLED:
-                    break
-                
-                await self._execute_step(workflow, step)
-                
-                if step.status == WorkflowStatus.FAILED:
-                    workflow.status = WorkflowStatus.FAILED
-                    break
+            await self._run_steps(workflow)
             
             if workflow.status == WorkflowStatus.RUNNING:
                 workflow.status = WorkflowStatus.COMPLETED
@@ -136,11 +284,49 @@ class WorkflowEngine:
         
         finally:
             self.running_workflows.discard(workflow.id)
+            await self._checkpoint(workflow)
         
         return workflow.results
     
+    async def _run_steps(self, workflow: Workflow):
+        """Run every step as soon as its dependencies have completed
+        
+        Once a step fails or the workflow is cancelled no new steps are
+        started, but steps already running are allowed to finish.
+        """
+        by_name = {step.name: step for step in workflow.steps}
+        pending = [step for step in workflow.steps if step.status != WorkflowStatus.COMPLETED]
+        running: Dict[asyncio.Task, WorkflowStep] = {}
+        
+        while pending or running:
+            if workflow.status == WorkflowStatus.RUNNING:
+                for step in list(pending):
+                    if all(by_name[d].status == WorkflowStatus.COMPLETED for d in step.depends_on or []):
+                        pending.remove(step)
+                        running[asyncio.create_task(self._execute_and_checkpoint(workflow, step))] = step
+            
+            if not running:
+                break
+            
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                step = running.pop(task)
+                task.result()
+                if step.status == WorkflowStatus.FAILED and workflow.status == WorkflowStatus.RUNNING:
+                    workflow.status = WorkflowStatus.FAILED
+    
+    async def _execute_and_checkpoint(self, workflow: Workflow, step: WorkflowStep):
+        """Execute a step, then checkpoint the workflow"""
+        await self._execute_step(workflow, step)
+        await self._checkpoint(workflow)
+    
     async def _execute_step(self, workflow: Workflow, step: WorkflowStep):
-        """Execute a single workflow step with retries"""
+        """Execute a single workflow step with retries
+        
+        Each attempt holds a slot of the engine-wide concurrency limit; the
+        slot is released during backoff so failing steps do not hold back
+        healthy ones.
+        """
         step.status = WorkflowStatus.RUNNING
         step.started_at = datetime.utcnow()
         
@@ -155,7 +341,9 @@ class WorkflowEngine:
             try:
                 # Pass previous step results as context
                 context = self._build_context(workflow, step)
-                step.result = await handler(step.params, context)
+                async with self.step_semaphore:
+                    with stage(f"workflow_{step.type.value}"):
+                        step.result = await handler(step.params, context)
                 step.status = WorkflowStatus.COMPLETED
                 step.completed_at = datetime.utcnow()
                 
@@ -173,6 +361,7 @@ class WorkflowEngine:
                     break
                 
                 # Exponential backoff
+                RETRIES.inc("workflow_step", step.type.value)
                 await asyncio.sleep(2 ** step.retry_count)
     
     def _build_context(self, workflow: Workflow, current_step: WorkflowStep) -> Dict[str, Any]:
@@ -180,15 +369,27 @@ class WorkflowEngine:
         context = {
             "workflow_id": workflow.id,
             "workflow_metadata": workflow.metadata,
-            "previous_results": {}
+            "previous_results": {},
+            "results_by_type": {}
         }
         
-        # Add results from completed steps
+        # Add results from completed upstream steps (transitive dependencies)
+        by_name = {step.name: step for step in workflow.steps}
+        upstream = set()
+        frontier = list(current_step.depends_on or [])
+        while frontier:
+            name = frontier.pop()
+            if name not in upstream:
+                upstream.add(name)
+                frontier.extend(by_name[name].depends_on or [])
+        
         for step in workflow.steps:
-            if step.id == current_step.id:
-                break
+            if step.name not in upstream:
+                continue
             if step.status == WorkflowStatus.COMPLETED and step.result:
                 context["previous_results"][step.name] = step.result
+                # Latest result per step type, for steps not named after their type
+                context["results_by_type"][step.type.value] = step.result
         
         return context
     
@@ -201,13 +402,42 @@ class WorkflowEngine:
             prompt=params.get("prompt", ""),
             style=params.get("style", "photorealistic"),
             quality=params.get("quality", "standard"),
-            workflow_name=params.get("workflow", "default")
+            workflow_name=params.get("workflow", "default"),
+            batch_size=params.get("batch_size", 1),
+            download_to=self.artifacts.root
         )
         
         if not result.get("success"):
             raise Exception(result.get("error", "Generation failed"))
         
-        return result
+        return await self._store_images(result)
+    
+    async def _store_images(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Swap a generation result's images for artifact handles"""
+        handles = []
+        for image in result.get("images", []):
+            if image.get("path"):
+                handles.append(await self.artifacts.register_file(
+                    Path(image["path"]), image["sha256"], image["size"], image.get("filename")
+                ))
+            elif image.get("image_data") is not None:
+                handles.append(await self.artifacts.put_bytes(
+                    image["image_data"], Path(image.get("filename") or "").suffix, image.get("filename")
+                ))
+        
+        if not handles and result.get("image_data") is not None:
+            handles.append(await self.artifacts.put_bytes(
+                result["image_data"], Path(result.get("filename") or "").suffix, result.get("filename")
+            ))
+        
+        stored = {key: value for key, value in result.items() if key != "image_data"}
+        stored["images"] = handles
+        return stored
+    
+    async def _read_images(self, generation_result: Dict[str, Any], limit: Optional[int] = None) -> List[bytes]:
+        """Load the bytes behind a generation result's artifact handles"""
+        handles = generation_result.get("images", [])[:limit]
+        return list(await asyncio.gather(*(self.artifacts.read(handle) for handle in handles)))
     
     async def _handle_qa_check(self, params: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         """Handle quality assurance check"""
@@ -215,29 +445,42 @@ class WorkflowEngine:
             return {"passed": True, "score": 1.0}
         
         # Get image data from previous generation step
-        generation_result = context["previous_results"].get("generate", {})
-        image_data = generation_result.get("image_data")
+        generation_result = (
+            context["previous_results"].get("generate")
+            or context["results_by_type"].get(StepType.GENERATE.value, {})
+        )
+        images = await self._read_images(generation_result)
         
-        if not image_data:
+        if not images:
             raise ValueError("No image data found for QA check")
         
-        # Perform QA analysis
-        analysis = await self.qa_system.analyze_image(image_data)
-        mutation_check = await self.qa_system.check_mutations(
-            image_data,
-            params.get("expected_features", [])
-        )
+        min_quality = params.get("min_quality", 0.8)
+        expected_features = params.get("expected_features", [])
         
-        qa_passed = (
-            analysis.get("quality_score", 0) >= params.get("min_quality", 0.8) and
-            not mutation_check.get("has_mutations", False)
-        )
+        async def check(image_data: bytes) -> Dict[str, Any]:
+            analysis, mutation_check = await asyncio.gather(
+                self.qa_system.analyze_image(image_data),
+                self.qa_system.check_mutations(image_data, expected_features)
+            )
+            return {
+                "passed": (
+                    analysis.get("quality_score", 0) >= min_quality and
+                    not mutation_check.get("has_mutations", False)
+                ),
+                "quality_score": analysis.get("quality_score"),
+                "issues": analysis.get("issues", []),
+                "mutations": mutation_check.get("mutation_details", [])
+            }
+        
+        # Perform QA analysis on every image in the batch
+        checks = await asyncio.gather(*(check(image_data) for image_data in images))
         
         return {
-            "passed": qa_passed,
-            "quality_score": analysis.get("quality_score"),
-            "issues": analysis.get("issues", []),
-            "mutations": mutation_check.get("mutation_details", [])
+            "passed": all(c["passed"] for c in checks),
+            "quality_score": min((c["quality_score"] or 0) for c in checks),
+            "issues": [issue for c in checks for issue in c["issues"]],
+            "mutations": [mutation for c in checks for mutation in c["mutations"]],
+            "images": checks
         }
     
     async def _handle_enhance(self, params: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
@@ -260,8 +503,11 @@ class WorkflowEngine:
             result = await self.comfyui_client.generate_image(
                 prompt=improved_prompt,
                 style=params.get("style", "photorealistic"),
-                quality="high"  # Use higher quality for enhancement
+                quality="high",  # Use higher quality for enhancement
+                download_to=self.artifacts.root
             )
+            if result.get("success"):
+                result = await self._store_images(result)
             
             return {
                 "enhanced": True,
@@ -293,11 +539,12 @@ class WorkflowEngine:
         
         # Get image data from generation or enhancement step
         if "enhance" in context["previous_results"] and context["previous_results"]["enhance"].get("enhanced"):
-            image_data = context["previous_results"]["enhance"]["result"].get("image_data")
+            source = context["previous_results"]["enhance"]["result"]
         else:
-            image_data = context["previous_results"].get("generate", {}).get("image_data")
+            source = context["previous_results"].get("generate", {})
+        handles = source.get("images", [])
         
-        if not image_data:
+        if not handles:
             raise ValueError("No image data found for upload")
         
         # Upload to specified platforms
@@ -308,16 +555,15 @@ class WorkflowEngine:
             "price": params.get("price", 0)
         }
         
-        if platforms == ["all"]:
-            results = await self.platform_manager.upload_to_all(image_data, metadata)
+        targets = None if platforms == ["all"] else platforms
+        if handles[0]["size"] > OE_UPLOAD_CHUNK_SIZE:
+            # Large artifacts are streamed from disk in resumable chunks
+            results = await self.platform_manager.upload_file_to_all(
+                self.artifacts.path(handles[0]["artifact_id"]), metadata, targets
+            )
         else:
-            results = {}
-            for platform in platforms:
-                if platform in self.platform_manager.platforms:
-                    result = await self.platform_manager.platforms[platform].upload_content(
-                        image_data, metadata
-                    )
-                    results[platform] = result
+            image_data = await self.artifacts.read(handles[0])
+            results = await self.platform_manager.upload_to_all(image_data, metadata, targets)
         
         return {"uploaded": True, "results": results}
     
@@ -331,16 +577,18 @@ class WorkflowEngine:
         scheduled_time = datetime.fromisoformat(params.get("scheduled_time", 
             (datetime.utcnow() + timedelta(hours=1)).isoformat()))
         
-        schedule_results = {}
+        content_ids = {
+            platform: upload_result.get("post_id") or upload_result.get("content_id")
+            for platform, upload_result in upload_results.items()
+            if upload_result and upload_result.get("success")
+        }
+        content_ids = {platform: content_id for platform, content_id in content_ids.items() if content_id}
         
-        for platform, upload_result in upload_results.items():
-            if upload_result.get("success"):
-                content_id = upload_result.get("post_id") or upload_result.get("content_id")
-                if content_id and self.platform_manager:
-                    schedule_result = await self.platform_manager.platforms[platform].schedule_post(
-                        content_id, scheduled_time, params.get("caption", "")
-                    )
-                    schedule_results[platform] = schedule_result
+        schedule_results = {}
+        if content_ids and self.platform_manager:
+            schedule_results = await self.platform_manager.schedule_to_platforms(
+                list(content_ids), content_ids, scheduled_time, params.get("caption", "")
+            )
         
         return {"scheduled": True, "results": schedule_results}
     
@@ -356,7 +604,7 @@ class WorkflowEngine:
             "type": notification_type,
             "recipient": recipient,
             "subject": f"Workflow {context['workflow_id']} {workflow_status}",
-            "body": json.dumps(context["previous_results"], indent=2)
+            "body": json.dumps(strip_binary(context["previous_results"]), indent=2, default=str)
         }
         
         # In production, send actual notification
@@ -371,6 +619,11 @@ class WorkflowEngine:
         
         workflow = self.workflows[workflow_id]
         
+        def duration(step: WorkflowStep) -> Optional[float]:
+            if step.started_at and step.completed_at:
+                return (step.completed_at - step.started_at).total_seconds()
+            return None
+        
         return {
             "id": workflow.id,
             "name": workflow.name,
@@ -383,13 +636,60 @@ class WorkflowEngine:
                     "name": step.name,
                     "type": step.type.value,
                     "status": step.status.value,
-                    "error": step.error
+                    "error": step.error,
+                    "depends_on": step.depends_on or [],
+                    "duration_seconds": duration(step)
                 }
                 for step in workflow.steps
             ],
-            "results": workflow.results
+            "timing": self._critical_path(workflow, duration),
+            "results": strip_binary(workflow.results)
         }
     
+    def _critical_path(self, workflow: Workflow, duration: Callable[[WorkflowStep], Optional[float]]) -> Dict[str, Any]:
+        """Longest dependency chain by step duration
+        
+        Steps only depend on earlier steps, so list order is a topological
+        order. Steps that have not finished count as zero.
+        """
+        finish: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for step in workflow.steps:
+            before = max(step.depends_on or [], key=lambda name: finish[name], default=None)
+            previous[step.name] = before
+            finish[step.name] = (finish[before] if before else 0.0) + (duration(step) or 0.0)
+        
+        path = []
+        name = max(finish, key=finish.get, default=None)
+        total = finish.get(name, 0.0) if name else 0.0
+        while name:
+            path.append(name)
+            name = previous[name]
+        
+        wall_clock = None
+        if workflow.started_at and workflow.completed_at:
+            wall_clock = (workflow.completed_at - workflow.started_at).total_seconds()
+        
+        return {
+            "critical_path": list(reversed(path)),
+            "critical_path_seconds": round(total, 3),
+            "wall_clock_seconds": wall_clock
+        }
+    
+    async def delete_workflow(self, workflow_id: str) -> bool:
+        """Forget a finished workflow and release its artifacts"""
+        if workflow_id not in self.workflows or workflow_id in self.running_workflows:
+            return False
+        
+        workflow = self.workflows.pop(workflow_id)
+        # Drop the checkpoint first so a restart never re-counts released handles
+        if self.store:
+            await self.store.delete(workflow_id)
+        for step in workflow.steps:
+            for handle in find_handles(step.result):
+                await self.artifacts.release(handle)
+        return True
+    
     async def cancel_workflow(self, workflow_id: str) -> bool:
         """Cancel a running workflow"""
         if workflow_id in self.workflows and workflow_id in self.running_workflows:
@@ -444,6 +744,7 @@ WORKFLOW_TEMPLATES = {
             {
                 "type": "target",
                 "name": "target",
+                "depends_on": ["generate"],
                 "params": {
                     "segments": ["high_engagement", "premium"]
                 }
@@ -451,6 +752,7 @@ WORKFLOW_TEMPLATES = {
             {
                 "type": "upload",
                 "name": "upload",
+                "depends_on": ["enhance"],
                 "params": {
                     "platforms": ["onlyfans", "fansly"]
                 }
@@ -458,6 +760,7 @@ WORKFLOW_TEMPLATES = {
             {
                 "type": "schedule",
                 "name": "schedule",
+                "depends_on": ["upload", "target"],
                 "params": {}
             },
             {
@@ -490,6 +793,7 @@ WORKFLOW_TEMPLATES = {
             {
                 "type": "target",
                 "name": "target_batch",
+                "depends_on": ["generate_batch"],
                 "params": {
                     "segments": ["general"]
                 }
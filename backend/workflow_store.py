@@ -0,0 +1,92 @@
+"""
+Workflow Store Module
+Durable checkpoints for workflow and step state
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+
+def _json_default(value: Any) -> Any:
+    """Keep checkpoints serializable even if a step returns raw bytes"""
+    if isinstance(value, bytes):
+        return f"<{len(value)} bytes>"
+    return str(value)
+
+
+class SQLiteWorkflowStore:
+    """Persists serialized workflows to a local SQLite file
+
+    Each workflow is stored as one JSON document, overwritten on every
+    checkpoint. Writes go through a worker thread so checkpointing never
+    blocks the event loop.
+    """
+
+    def __init__(self, path: Path):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS oe_workflow_runs ("
+            "id TEXT PRIMARY KEY, name TEXT NOT NULL, status TEXT NOT NULL, "
+            "data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_oe_workflow_runs_status ON oe_workflow_runs(status)"
+        )
+        self.db.commit()
+
+    def _save(self, data: Dict[str, Any]):
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO oe_workflow_runs (id, name, status, data, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (data["id"], data["name"], data["status"], json.dumps(data, default=_json_default), time.time())
+            )
+            self.db.commit()
+
+    def _load_by_status(self, statuses: List[str]) -> List[Dict[str, Any]]:
+        placeholders = ",".join("?" for _ in statuses)
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT data FROM oe_workflow_runs WHERE status IN ({placeholders}) ORDER BY updated_at",
+                statuses
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _load(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.db.execute(
+                "SELECT data FROM oe_workflow_runs WHERE id = ?", (workflow_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _delete(self, workflow_id: str):
+        with self.lock:
+            self.db.execute("DELETE FROM oe_workflow_runs WHERE id = ?", (workflow_id,))
+            self.db.commit()
+
+    async def save(self, data: Dict[str, Any]):
+        """Checkpoint a serialized workflow"""
+        await asyncio.to_thread(self._save, data)
+
+    async def load(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        """Load one serialized workflow"""
+        return await asyncio.to_thread(self._load, workflow_id)
+
+    async def load_by_status(self, statuses: List[str]) -> List[Dict[str, Any]]:
+        """Load every workflow currently in one of the given statuses"""
+        return await asyncio.to_thread(self._load_by_status, statuses)
+
+    async def delete(self, workflow_id: str):
+        """Remove a workflow's checkpoint"""
+        await asyncio.to_thread(self._delete, workflow_id)
+
+    def close(self):
+        """Close the database"""
+        with self.lock:
+            self.db.close()
@@ -25,7 +25,7 @@ class ServiceMonitor:
             "backend": {
                 "name": "FastAPI Backend",
                 "port": 8001,
-                "health_check": "http://localhost:8001/api/stats",
+                "health_check": "http://localhost:8001/healthz",
                 "start_command": "cd backend && python real_main.py",
                 "process_name": "python"
             },
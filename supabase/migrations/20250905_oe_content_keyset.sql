@@ -0,0 +1,2 @@
+-- Keyset pagination for content listings: ORDER BY created_at DESC, id DESC
+CREATE INDEX IF NOT EXISTS idx_oe_content_user_created_at ON oe_content(user_id, created_at DESC, id DESC);
@@ -0,0 +1,115 @@
+-- ============================================
+-- ANALYTICS ROLLUP
+-- Per-content and per-user counters folded from oe_analytics
+-- ============================================
+
+-- Rows are folded exactly once; the partial index keeps pending rows cheap to find
+ALTER TABLE oe_analytics ADD COLUMN IF NOT EXISTS rolled_up BOOLEAN NOT NULL DEFAULT false;
+CREATE INDEX IF NOT EXISTS idx_oe_analytics_pending ON oe_analytics(recorded_at) WHERE NOT rolled_up;
+
+-- engagement_rate is unconstrained NUMERIC: interactions can far exceed views
+-- (1 view, 1000 likes = 100000%), and an overflow would abort every rollup
+CREATE TABLE IF NOT EXISTS oe_content_stats (
+  content_id UUID PRIMARY KEY REFERENCES oe_content(id) ON DELETE CASCADE,
+  user_id UUID NOT NULL REFERENCES oe_users(id) ON DELETE CASCADE,
+  views BIGINT NOT NULL DEFAULT 0,
+  likes BIGINT NOT NULL DEFAULT 0,
+  comments BIGINT NOT NULL DEFAULT 0,
+  shares BIGINT NOT NULL DEFAULT 0,
+  saves BIGINT NOT NULL DEFAULT 0,
+  clicks BIGINT NOT NULL DEFAULT 0,
+  impressions BIGINT NOT NULL DEFAULT 0,
+  downloads BIGINT NOT NULL DEFAULT 0,
+  revenue_cents BIGINT NOT NULL DEFAULT 0,
+  engagement_rate NUMERIC GENERATED ALWAYS AS (
+    CASE WHEN views > 0 THEN ROUND((likes + comments + shares + saves) * 100.0 / views, 2) ELSE 0 END
+  ) STORED,
+  updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS oe_user_stats (
+  user_id UUID PRIMARY KEY REFERENCES oe_users(id) ON DELETE CASCADE,
+  views BIGINT NOT NULL DEFAULT 0,
+  likes BIGINT NOT NULL DEFAULT 0,
+  comments BIGINT NOT NULL DEFAULT 0,
+  shares BIGINT NOT NULL DEFAULT 0,
+  saves BIGINT NOT NULL DEFAULT 0,
+  clicks BIGINT NOT NULL DEFAULT 0,
+  impressions BIGINT NOT NULL DEFAULT 0,
+  downloads BIGINT NOT NULL DEFAULT 0,
+  revenue_cents BIGINT NOT NULL DEFAULT 0,
+  engagement_rate NUMERIC GENERATED ALWAYS AS (
+    CASE WHEN views > 0 THEN ROUND((likes + comments + shares + saves) * 100.0 / views, 2) ELSE 0 END
+  ) STORED,
+  updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_oe_content_stats_user_id ON oe_content_stats(user_id);
+
+-- Fold up to batch_size pending analytics rows into the stats tables.
+-- Returns the number of rows folded; call again while it equals batch_size.
+CREATE OR REPLACE FUNCTION oe_rollup_analytics(batch_size INTEGER DEFAULT 10000)
+RETURNS INTEGER AS $$
+DECLARE
+  folded INTEGER;
+BEGIN
+  WITH batch AS (
+    SELECT id FROM oe_analytics
+    WHERE NOT rolled_up
+    ORDER BY recorded_at
+    LIMIT batch_size
+    FOR UPDATE SKIP LOCKED
+  ), marked AS (
+    UPDATE oe_analytics a SET rolled_up = true
+    FROM batch WHERE a.id = batch.id
+    RETURNING a.content_id, a.user_id,
+      COALESCE(a.views, 0) AS views, COALESCE(a.likes, 0) AS likes,
+      COALESCE(a.comments, 0) AS comments, COALESCE(a.shares, 0) AS shares,
+      COALESCE(a.saves, 0) AS saves, COALESCE(a.clicks, 0) AS clicks,
+      COALESCE(a.impressions, 0) AS impressions,
+      CASE WHEN a.metric_type = 'download' THEN COALESCE(a.metric_value, 1) ELSE 0 END AS downloads,
+      COALESCE(a.revenue_cents, 0) AS revenue_cents
+  ), content_rollup AS (
+    INSERT INTO oe_content_stats AS s
+      (content_id, user_id, views, likes, comments, shares, saves, clicks, impressions, downloads, revenue_cents)
+    SELECT content_id, (ARRAY_AGG(user_id))[1], SUM(views), SUM(likes), SUM(comments), SUM(shares),
+      SUM(saves), SUM(clicks), SUM(impressions), SUM(downloads), SUM(revenue_cents)
+    FROM marked WHERE content_id IS NOT NULL
+    GROUP BY content_id
+    ON CONFLICT (content_id) DO UPDATE SET
+      views = s.views + EXCLUDED.views,
+      likes = s.likes + EXCLUDED.likes,
+      comments = s.comments + EXCLUDED.comments,
+      shares = s.shares + EXCLUDED.shares,
+      saves = s.saves + EXCLUDED.saves,
+      clicks = s.clicks + EXCLUDED.clicks,
+      impressions = s.impressions + EXCLUDED.impressions,
+      downloads = s.downloads + EXCLUDED.downloads,
+      revenue_cents = s.revenue_cents + EXCLUDED.revenue_cents,
+      updated_at = NOW()
+  ), user_rollup AS (
+    INSERT INTO oe_user_stats AS s
+      (user_id, views, likes, comments, shares, saves, clicks, impressions, downloads, revenue_cents)
+    SELECT user_id, SUM(views), SUM(likes), SUM(comments), SUM(shares),
+      SUM(saves), SUM(clicks), SUM(impressions), SUM(downloads), SUM(revenue_cents)
+    FROM marked
+    GROUP BY user_id
+    ON CONFLICT (user_id) DO UPDATE SET
+      views = s.views + EXCLUDED.views,
+      likes = s.likes + EXCLUDED.likes,
+      comments = s.comments + EXCLUDED.comments,
+      shares = s.shares + EXCLUDED.shares,
+      saves = s.saves + EXCLUDED.saves,
+      clicks = s.clicks + EXCLUDED.clicks,
+      impressions = s.impressions + EXCLUDED.impressions,
+      downloads = s.downloads + EXCLUDED.downloads,
+      revenue_cents = s.revenue_cents + EXCLUDED.revenue_cents,
+      updated_at = NOW()
+  )
+  SELECT COUNT(*) INTO folded FROM marked;
+  RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON TABLE oe_content_stats IS 'Per-content analytics totals rolled up from oe_analytics';
+COMMENT ON TABLE oe_user_stats IS 'Per-user analytics totals rolled up from oe_analytics';